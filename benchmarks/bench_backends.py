@@ -0,0 +1,69 @@
+"""
+Benchmark: real-time factor of the Whisper inference backends.
+
+Usage:
+    python -m benchmarks.bench_backends [--model base] [--audio meeting.wav]
+                                        [--seconds 60] [--backends openai torch-int8 faster-whisper]
+
+RTF = processing time / audio duration (below 1.0 keeps up with real time).
+Backends whose optional dependency is missing are reported and skipped.
+"""
+import argparse
+import time
+
+import numpy as np
+import soundfile as sf
+
+from services.resampler import to_whisper_input
+from services.whisper_backends import BACKENDS
+from services.whisper_service import WhisperTranscriber
+
+
+def load_audio(path, seconds):
+    """16 kHz mono float32 audio from a file, or synthetic noise without one."""
+    if path:
+        rate = sf.info(path).samplerate
+        audio, rate = sf.read(path, dtype="float32", frames=int(seconds * rate))
+        return to_whisper_input(audio, rate)
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * 16000)) * 0.05).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--audio", help="Audio file to transcribe")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Seconds of audio to transcribe")
+    parser.add_argument("--chunk-seconds", type=float, default=15.0, help="Seconds per transcribe() call")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    args = parser.parse_args()
+
+    audio = load_audio(args.audio, args.seconds)
+    duration = len(audio) / 16000.0
+    step = int(args.chunk_seconds * 16000)
+    chunks = [audio[i:i + step] for i in range(0, len(audio), step)]
+
+    rows = []
+    for name in args.backends:
+        try:
+            start = time.perf_counter()
+            transcriber = WhisperTranscriber(model_size=args.model, backend=name)
+            load_seconds = time.perf_counter() - start
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+
+        transcriber.transcribe(chunks[0])  # Warm-up
+        start = time.perf_counter()
+        for chunk in chunks:
+            transcriber.transcribe(chunk)
+        elapsed = time.perf_counter() - start
+        rows.append((name, load_seconds, elapsed, elapsed / duration))
+
+    print(f"\n{'backend':<16}{'load (s)':>10}{'run (s)':>10}{'RTF':>8}")
+    for name, load_seconds, elapsed, rtf in rows:
+        print(f"{name:<16}{load_seconds:>10.1f}{elapsed:>10.1f}{rtf:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
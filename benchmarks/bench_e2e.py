@@ -0,0 +1,344 @@
+"""
+Benchmark: the whole pipeline, capture chunking -> VAD -> Whisper -> LLM summary.
+
+Usage:
+    python -m benchmarks.bench_e2e [--audio meeting.wav ...] [--seconds 120]
+                                   [--model base] [--backend openai]
+                                   [--segmentation vad] [--chunk-seconds 15]
+                                   [--llm-latency 0.8] [--summary-chunks 1]
+                                   [--realtime] [--no-vad] [--output result.json]
+
+Fixtures are the --audio files (any format soundfile reads) or, without
+them, a seeded synthetic signal (noise bursts separated by pauses), so
+every run sees the same input. They are played block by block into
+AudioRecorder's audio callback, so chunks are cut exactly as in a live
+recording (ring buffer, pause detection, writer thread). Chunks go through
+WhisperTranscriber.transcribe and the transcripts through
+LLMRouter.process_transcript, each stage on its own thread as in the app.
+The LLM is a local OpenAI-compatible mock server with a fixed latency, so
+runs are offline and free.
+
+By default audio is played as fast as the callback takes it (throughput);
+--realtime paces it like a microphone, which makes the latencies the ones
+a live meeting would see. The result is one JSON document (printed, and
+written to --output) to diff across commits: throughput, per-stage
+p50/p99 latency in seconds, real-time factor and peak RSS.
+"""
+import argparse
+import json
+import os
+import platform
+import queue
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import soundfile as sf
+
+from services.audio_service import AudioRecorder
+from services.vad import EnergyVAD
+
+
+class MockLLMServer:
+    """
+    Local stand-in for OpenRouter: an OpenAI-compatible /chat/completions
+    endpoint (blocking and streamed replies).
+
+    Every request waits latency seconds, then answers with a JSON summary
+    echoing the end of the prompt. Usage is counted at 4 characters per token.
+    """
+    def __init__(self, latency=0.8, port=0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                time.sleep(server.latency)
+                with server._lock:
+                    server.requests += 1
+                    number = server.requests
+                if request.get("stream"):
+                    self._stream(server._reply(request, number))
+                else:
+                    body = json.dumps(server._reply(request, number)).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def _stream(self, reply):
+                """Server-sent events: the content in small deltas, then usage, then [DONE]."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                content = reply["choices"][0]["message"]["content"]
+                base = {key: reply[key] for key in ("id", "created", "model")}
+                for i in range(0, len(content), 16):
+                    delta = {"index": 0, "delta": {"content": content[i:i + 16]}, "finish_reason": None}
+                    self._event(dict(base, object="chat.completion.chunk", choices=[delta]))
+                self._event(dict(base, object="chat.completion.chunk", choices=[], usage=reply["usage"]))
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def _event(self, data):
+                self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+            def log_message(self, format, *args):
+                pass  # One line per request would swamp the results
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.api_base = f"http://127.0.0.1:{self._httpd.server_address[1]}/api/v1"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def _reply(request, number):
+        messages = request.get("messages", [])
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+        last = str(messages[-1].get("content", "")) if messages else ""
+        content = json.dumps({"updated_summary": f"Summary {number}: {last[-200:]}"})
+        prompt_tokens, completion_tokens = prompt_chars // 4, len(content) // 4
+        return {
+            "id": f"chatcmpl-mock-{number}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class FixtureRecorder(AudioRecorder):
+    """AudioRecorder played from fixtures instead of a device; remembers when each chunk closed."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.boundaries = []  # Epoch time each chunk was cut, in chunk order
+
+    def _signal_boundary(self, finished):
+        self.boundaries.append(time.time())
+        super()._signal_boundary(finished)
+
+    def play(self, audio, rate, realtime=False, callback_seconds=None):
+        """Feeds (frames, channels) audio through the audio callback, one PortAudio block at a time."""
+        block = self._prepare_buffer(rate, audio.shape[1])
+        self.running = self.capturing = True
+        started = time.perf_counter()
+        for i in range(0, len(audio), block):
+            indata = audio[i:i + block]
+            if len(indata) < block:
+                indata = np.pad(indata, ((0, block - len(indata)), (0, 0)))
+            if realtime:
+                time.sleep(max(0.0, started + i / rate - time.perf_counter()))
+            else:
+                # A device cannot outrun the writer by a whole ring; don't let the fixture either
+                ring = self._ring
+                while ring.emitted - ring.released >= ring.slots - 1:
+                    time.sleep(0.001)
+            t = time.perf_counter()
+            self._audio_callback(indata, block, None, None)
+            if callback_seconds is not None:
+                callback_seconds.append(time.perf_counter() - t)
+        # End of the fixture: close the last chunk like stop_recording()
+        self._flush_requested = True
+        self._handle_requests()
+
+    def drain(self):
+        """Waits until the writer has handed every chunk over."""
+        self._boundary_queue.put(None)
+        self._writer_thread.join()
+        self.running = self.capturing = False
+
+
+def load_fixtures(paths, seconds, seed=0):
+    """The fixture files as [(float32 (frames, channels), rate)], or one synthesized fixture."""
+    if paths:
+        return [sf.read(path, dtype="float32", always_2d=True) for path in paths]
+
+    # Noise bursts of 3-8 s with 0.8 s pauses (where VAD segmentation cuts)
+    rng = np.random.default_rng(seed)
+    rate = 16000
+    parts, frames = [], 0
+    while frames < seconds * rate:
+        burst = (rng.standard_normal(int(rng.uniform(3, 8) * rate)) * 0.05).astype(np.float32)
+        parts += [burst, np.zeros(int(0.8 * rate), np.float32)]
+        frames += len(parts[-2]) + len(parts[-1])
+    return [(np.concatenate(parts)[:int(seconds * rate), None], rate)]
+
+
+def summarize_latencies(values):
+    """count, mean, p50, p99 and max of a list of seconds."""
+    if not values:
+        return {"count": 0}
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "count": int(len(values)),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB (None where resource is unavailable, e.g. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB on Linux
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", nargs="+", help="Fixture files (default: a synthesized fixture)")
+    parser.add_argument("--seconds", type=float, default=120.0, help="Length of the synthesized fixture")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--backend", default="openai", help="Whisper backend (openai, torch-int8, faster-whisper)")
+    parser.add_argument("--segmentation", default="vad", choices=("vad", "fixed"), help="Chunk cutting")
+    parser.add_argument("--chunk-seconds", type=float, default=15.0, help="Chunk length (maximum with vad)")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="Seconds the mock LLM takes per request")
+    parser.add_argument("--llm-model", default="nvidia/nemotron-nano-9b-v2:free", help="Model name sent to the mock")
+    parser.add_argument("--summary-chunks", type=int, default=1, help="Transcripts per LLM call")
+    parser.add_argument("--realtime", action="store_true", help="Play fixtures at real-time speed")
+    parser.add_argument("--no-vad", action="store_true", help="Send every chunk to Whisper")
+    parser.add_argument("--output", help="Also write the JSON result here")
+    args = parser.parse_args()
+
+    # Imported here so --help works without Whisper and litellm (AudioRecorder still needs sounddevice)
+    from services.llm_router import LLMRouter
+    from services.whisper_service import WhisperTranscriber
+
+    fixtures = load_fixtures(args.audio, args.seconds)
+    mock = MockLLMServer(latency=args.llm_latency)
+    os.environ.setdefault("OPENAI_API_KEY", "sk-noties-benchmark")
+    llm = LLMRouter(model_name=args.llm_model, context_mode="hierarchical", api_base=mock.api_base)
+    llm.warm_up()
+    transcriber = WhisperTranscriber(model_size=args.model, backend=args.backend)
+    transcriber.warm_up()
+    vad = None if args.no_vad else EnergyVAD()
+
+    recorder = FixtureRecorder(chunk_duration=args.chunk_seconds, capture_profile="transcription",
+                               segmentation=args.segmentation, min_chunk_duration=min(4, args.chunk_seconds))
+    recorder._writer_thread = threading.Thread(target=recorder._writer_loop, daemon=True)
+    recorder._writer_thread.start()
+
+    latencies = {"callback": [], "flush": [], "transcribe": [], "llm": [], "end_to_end": []}
+    counts = {"chunks": 0, "skipped_chunks": 0, "empty_chunks": 0, "llm_calls": 0}
+    busy = {"transcribe": 0.0, "whisper_audio": 0.0}  # Whisper seconds, audio seconds sent to it
+    transcripts = queue.Queue()
+
+    def transcribe_stage():
+        """audio_queue -> VAD -> Whisper -> transcripts (None ends the stage)."""
+        index = 0
+        while True:
+            chunk = recorder.audio_queue.get()
+            if chunk is None:
+                transcripts.put(None)
+                return
+            boundary = recorder.boundaries[index]
+            index += 1
+            counts["chunks"] += 1
+            latencies["flush"].append(chunk.queued_at - boundary)
+            if vad is not None:
+                chunk = vad.process(chunk)
+                if chunk is None:
+                    counts["skipped_chunks"] += 1
+                    continue
+            busy["whisper_audio"] += chunk.duration
+            started = time.perf_counter()
+            text = transcriber.transcribe(chunk)
+            elapsed = time.perf_counter() - started
+            latencies["transcribe"].append(elapsed)
+            busy["transcribe"] += elapsed
+            if text:
+                transcripts.put((text, boundary))
+            else:
+                counts["empty_chunks"] += 1
+
+    def summarize_stage():
+        """transcripts -> LLMRouter.process_transcript, summary_chunks at a time."""
+        batch, done = [], False
+        while not done:
+            item = transcripts.get()
+            if item is None:
+                done = True
+            else:
+                batch.append(item)
+            if batch and (done or len(batch) >= args.summary_chunks):
+                started = time.perf_counter()
+                result = llm.process_transcript("\n\n".join(text for text, _ in batch))
+                latencies["llm"].append(time.perf_counter() - started)
+                counts["llm_calls"] += 1
+                if "error" in result:
+                    print(f"LLM error: {result['error']}", file=sys.stderr)
+                finished = time.time()
+                latencies["end_to_end"].extend(finished - boundary for _, boundary in batch)
+                batch = []
+
+    stages = [threading.Thread(target=transcribe_stage), threading.Thread(target=summarize_stage)]
+    started = time.perf_counter()
+    for stage in stages:
+        stage.start()
+    for audio, rate in fixtures:
+        recorder.play(audio, rate, realtime=args.realtime, callback_seconds=latencies["callback"])
+    recorder.drain()
+    recorder.audio_queue.put(None)
+    for stage in stages:
+        stage.join()
+    wall_seconds = time.perf_counter() - started
+    mock.close()
+
+    audio_seconds = sum(len(audio) / rate for audio, rate in fixtures)
+    result = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "audio_seconds": audio_seconds,
+        "whisper_audio_seconds": busy["whisper_audio"],
+        "wall_seconds": wall_seconds,
+        "throughput": {
+            "audio_seconds_per_second": audio_seconds / wall_seconds if wall_seconds else 0.0,
+            "chunks_per_second": counts["chunks"] / wall_seconds if wall_seconds else 0.0,
+        },
+        # Whisper seconds per second of audio it was given (after VAD skipping and trimming)
+        "rtf": busy["transcribe"] / busy["whisper_audio"] if busy["whisper_audio"] else 0.0,
+        "counts": dict(counts, dropped_blocks=recorder.get_overflow_count()),
+        "stages": {name: summarize_latencies(values) for name, values in latencies.items()},
+        "peak_rss_mb": peak_rss_mb(),
+        "startup": transcriber.timings,
+        "whisper": transcriber.get_stats(),
+        "vad": vad.get_stats() if vad is not None else None,
+        "llm_usage": dict(llm.usage),
+        "mock_llm_requests": mock.requests,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
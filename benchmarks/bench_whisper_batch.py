@@ -0,0 +1,74 @@
+"""
+Benchmark: Whisper throughput (chunks/sec) versus batch size.
+
+Usage:
+    python -m benchmarks.bench_whisper_batch [--model base] [--audio meeting.wav]
+                                             [--chunks 8] [--chunk-seconds 15]
+                                             [--batch-sizes 1 2 4 8]
+
+Chunks are cut from --audio (any format soundfile reads) or, without it,
+synthesized as noise bursts. Each batch size decodes the same chunks
+through the backend's transcribe_batch (greedy, no timestamps), batch size
+1 included, so the table isolates batching from the decoding settings.
+WhisperTranscriber.transcribe_batch sends single chunks and redecodes
+through transcribe() instead (temperature fallback, timestamps), which is
+slower per chunk for reasons unrelated to batching.
+"""
+import argparse
+import time
+
+import numpy as np
+import soundfile as sf
+
+from services.audio_service import AudioChunk
+from services.whisper_service import WhisperTranscriber
+
+
+def load_chunks(path, count, seconds):
+    """Cuts count chunks of the given length from a file, or synthesizes them."""
+    if path:
+        audio, rate = sf.read(path, dtype="float32", frames=int(count * seconds * sf.info(path).samplerate))
+        frames = int(seconds * rate)
+        return [AudioChunk(audio[i * frames:(i + 1) * frames], rate)
+                for i in range(count) if len(audio[i * frames:(i + 1) * frames])]
+
+    rng = np.random.default_rng(0)
+    frames = int(seconds * 16000)
+    return [AudioChunk((rng.standard_normal(frames) * 0.05).astype(np.float32), 16000) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--audio", help="Audio file to cut chunks from")
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks per run")
+    parser.add_argument("--chunk-seconds", type=float, default=15.0, help="Seconds per chunk (max 30)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.audio, args.chunks, args.chunk_seconds)
+    transcriber = WhisperTranscriber(model_size=args.model)
+
+    # Resample once up front; only the decoder passes are timed
+    audios = [transcriber._load_audio(chunk)[0] for chunk in chunks]
+    backend = transcriber.backend
+
+    # Warm-up so the first timed run does not pay for lazy initialisation
+    backend.transcribe_batch(audios[:1], **transcriber.decode_options)
+
+    audio_seconds = sum(c.duration for c in chunks)
+    rows = []
+    for size in args.batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(audios), size):
+            backend.transcribe_batch(audios[i:i + size], **transcriber.decode_options)
+        elapsed = time.perf_counter() - start
+        rows.append((size, len(chunks) / elapsed, elapsed / audio_seconds))
+
+    print(f"\n{'batch':>6}{'chunks/sec':>14}{'RTF':>10}")
+    for size, throughput, rtf in rows:
+        print(f"{size:>6}{throughput:>14.2f}{rtf:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
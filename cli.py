@@ -0,0 +1,287 @@
+"""
+Headless batch transcription and summarization of recorded meetings.
+
+Usage:
+    python cli.py INPUT [INPUT ...] --output-dir notes/ [--workers 2] [--model base]
+                  [--backend openai] [--chunk-seconds 30] [--summary-chunks 4]
+                  [--llm-model nvidia/nemotron-nano-9b-v2:free] [--no-summary]
+
+INPUT may be audio files or directories (searched recursively). Outputs
+mirror each file's path below the directory it was found in. Files are
+read in chunk-sized blocks, so memory stays flat however long a recording
+is, and run in parallel across worker processes, each with its own model.
+For every file the output directory gets:
+    <name>.transcript.txt   one line per transcribed chunk
+    <name>.summary.md       the final summary
+    <name>.progress.json    chunks done so far (resume point)
+    <name>.done.json        per-file report, written last
+Interrupted runs resume where they stopped: finished files are skipped,
+partial transcripts continue from the last completed chunk and replayed
+summary prompts are answered from the shared LLM response cache.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import soundfile as sf
+
+from services.audio_service import AudioChunk
+from services.resampler import WHISPER_RATE, to_whisper_input
+from services.vad import EnergyVAD
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".opus", ".mp3", ".aiff", ".aif")
+
+# Per-process services, created once by _init_worker
+_worker = {}
+
+
+def find_audio_files(inputs):
+    """
+    Expands directories into the audio files below them.
+
+    Returns:
+        dict: path -> name relative to the input it was found under (sorted by path)
+    """
+    files = {}
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in names:
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        file_path = os.path.join(root, name)
+                        files.setdefault(file_path, os.path.relpath(file_path, path))
+        else:
+            files.setdefault(path, os.path.basename(path))
+    return dict(sorted(files.items()))
+
+
+def output_stems(output_dir, files):
+    """
+    Output path prefix for every input file: its relative name without
+    extension, plus a hash of its absolute path where two inputs would
+    still collide (e.g. the same file name given from two directories).
+    """
+    stems = {path: os.path.join(output_dir, os.path.splitext(name)[0]) for path, name in files.items()}
+    counts = {}
+    for stem in stems.values():
+        counts[stem] = counts.get(stem, 0) + 1
+    for path, stem in stems.items():
+        if counts[stem] > 1:
+            digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+            stems[path] = f"{stem}-{digest}"
+    return stems
+
+
+def _write_json(path, data):
+    """Atomic write, so an interrupted run never leaves a half-written progress file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _init_worker(options):
+    """
+    Loads Whisper (and the LLM router) once per worker process.
+
+    Setup errors (no model, no API key) are kept and reported by every
+    file instead of breaking the process pool.
+    """
+    _worker["options"] = options
+    _worker["transcriber"] = _worker["llm"] = None
+    _worker["error"] = _worker["llm_error"] = None
+    try:
+        from services.whisper_service import WhisperTranscriber
+        _worker["transcriber"] = WhisperTranscriber(model_size=options["model"], backend=options["backend"])
+    except Exception as e:
+        _worker["error"] = f"Whisper setup failed: {e}"
+        return
+    if options["summary"]:
+        try:
+            from services.llm_cache import ResponseCache
+            from services.llm_router import LLMRouter
+            cache = ResponseCache(db_path=os.path.join(options["output_dir"], "llm_cache.sqlite"))
+            _worker["llm"] = LLMRouter(model_name=options["llm_model"], context_mode="hierarchical", cache=cache)
+        except Exception as e:
+            _worker["llm_error"] = f"LLM setup failed: {e}"
+
+
+def transcribe_file(path, stem, chunk_seconds):
+    """
+    Transcribes a file chunk by chunk, appending to <stem>.transcript.txt.
+
+    Progress (frames read, transcript bytes) is recorded after every
+    chunk; a rerun seeks past the frames already done, whatever chunk
+    length it uses, and truncates any line written after the last record.
+    A chunk that fails to transcribe stops the file with progress left
+    before it, so the rerun tries it again.
+
+    Returns:
+        dict: chunks, skipped (silent) chunks, audio_seconds, sample_rate
+    """
+    transcriber = _worker["transcriber"]
+    vad = EnergyVAD()
+    transcript_path = stem + ".transcript.txt"
+    progress_path = stem + ".progress.json"
+    progress = _read_json(progress_path)
+    if progress is None or "frames" not in progress:
+        progress = {"frames": 0, "chunks": 0, "skipped": 0, "bytes": 0}
+
+    with open(transcript_path, "a+b") as transcript:
+        transcript.truncate(progress["bytes"])
+        # Continue the rolling prompt from the transcript written so far
+        transcript.seek(0)
+        transcriber.reset_context()
+        transcriber.context = transcript.read().decode("utf-8")[-transcriber.prompt_chars:].strip()
+
+        with sf.SoundFile(path) as audio:
+            rate = audio.samplerate
+            chunk_frames = int(chunk_seconds * rate)
+            audio.seek(min(progress["frames"], audio.frames))
+            for block in audio.blocks(blocksize=chunk_frames, dtype="float32"):
+                # Silent chunks skip Whisper; the rest are trimmed to their speech
+                speech = vad.process(AudioChunk(to_whisper_input(block, rate), WHISPER_RATE))
+                text = transcriber.transcribe(speech) if speech is not None else ""
+                if text is None:
+                    raise RuntimeError(f"Transcription failed at {progress['frames'] / rate:.1f}s")
+                if text:
+                    transcript.write((text + "\n").encode("utf-8"))
+                    transcript.flush()
+                else:
+                    progress["skipped"] += 1
+                progress["frames"] += len(block)
+                progress["chunks"] += 1
+                progress["bytes"] = transcript.tell()
+                _write_json(progress_path, progress)
+
+    progress["audio_seconds"] = audio.frames / rate
+    progress["sample_rate"] = rate
+    return progress
+
+
+def summarize_file(stem, summary_chunks):
+    """Summarizes <stem>.transcript.txt into <stem>.summary.md. Returns LLM usage counters."""
+    llm = _worker["llm"]
+    llm.start_session()
+    with open(stem + ".transcript.txt", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    for i in range(0, len(lines), summary_chunks):
+        result = llm.process_transcript("\n\n".join(lines[i:i + summary_chunks]))
+        if "error" in result:
+            raise RuntimeError(f"Summary failed: {result['error']}")
+    summary = llm.finalize_summary()
+
+    with open(stem + ".summary.md", "w", encoding="utf-8") as f:
+        f.write(summary + "\n")
+    return dict(llm.usage)
+
+
+def process_file(path, stem):
+    """Transcribes and summarizes one file (worker process). Returns its report."""
+    options = _worker["options"]
+    started = time.perf_counter()
+    try:
+        if _worker["error"]:
+            raise RuntimeError(_worker["error"])
+        report = {"file": path}
+        report.update(transcribe_file(path, stem, options["chunk_seconds"]))
+        report["transcribe_seconds"] = time.perf_counter() - started
+        # The transcript is kept; a rerun with the LLM fixed only summarizes
+        if _worker["llm_error"]:
+            raise RuntimeError(_worker["llm_error"])
+        if _worker["llm"] is not None:
+            report["llm_usage"] = summarize_file(stem, options["summary_chunks"])
+        report["wall_seconds"] = time.perf_counter() - started
+        report["rtf"] = report["transcribe_seconds"] / report["audio_seconds"] if report["audio_seconds"] else 0.0
+        report["whisper"] = _worker["transcriber"].get_stats()
+        _worker["transcriber"].reset_stats()
+        _write_json(stem + ".done.json", report)
+        return report
+    except Exception as e:
+        return {"file": path, "error": str(e), "wall_seconds": time.perf_counter() - started}
+
+
+def print_report(reports, wall_seconds):
+    """Per-file table and totals (audio processed per second of wall time)."""
+    print(f"\n{'file':<40}{'audio min':>11}{'wall s':>9}{'RTF':>8}{'chunks':>8}{'skipped':>9}")
+    for r in reports:
+        name = os.path.basename(r["file"])[:38]
+        if "error" in r:
+            print(f"{name:<40}  ERROR: {r['error']}")
+            continue
+        print(f"{name:<40}{r['audio_seconds'] / 60:>11.1f}{r['wall_seconds']:>9.1f}{r['rtf']:>8.3f}"
+              f"{r['chunks']:>8}{r['skipped']:>9}")
+
+    done = [r for r in reports if "error" not in r]
+    audio_seconds = sum(r["audio_seconds"] for r in done)
+    print(f"\n{len(done)}/{len(reports)} files, {audio_seconds / 3600:.2f} h of audio in {wall_seconds:.1f} s "
+          f"({audio_seconds / wall_seconds if wall_seconds else 0.0:.1f} audio seconds per second)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Audio files or directories")
+    parser.add_argument("--output-dir", required=True, help="Where transcripts, summaries and progress go")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes (each loads a model)")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--backend", default="openai", help="Whisper backend (openai, torch-int8, faster-whisper)")
+    parser.add_argument("--chunk-seconds", type=float, default=30.0, help="Seconds per transcribed block (max 30)")
+    parser.add_argument("--summary-chunks", type=int, default=4, help="Transcript chunks per LLM call")
+    parser.add_argument("--llm-model", default="nvidia/nemotron-nano-9b-v2:free", help="OpenRouter model")
+    parser.add_argument("--no-summary", action="store_true", help="Only transcribe")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stems = output_stems(args.output_dir, find_audio_files(args.inputs))
+    reports, pending = [], []
+    for path, stem in stems.items():
+        done = _read_json(stem + ".done.json")
+        if done is not None:
+            print(f"Skipping {path} (done)")
+        else:
+            os.makedirs(os.path.dirname(stem), exist_ok=True)
+            pending.append(path)
+    if not pending:
+        print("Nothing to do.")
+        return
+
+    options = {
+        "output_dir": args.output_dir,
+        "model": args.model,
+        "backend": args.backend,
+        "chunk_seconds": min(args.chunk_seconds, 30.0),
+        "summary_chunks": args.summary_chunks,
+        "llm_model": args.llm_model,
+        "summary": not args.no_summary,
+    }
+    started = time.perf_counter()
+    workers = max(1, min(args.workers, len(pending)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as executor:
+        futures = [executor.submit(process_file, path, stems[path]) for path in pending]
+        for future in as_completed(futures):
+            report = future.result()
+            status = f"error: {report['error']}" if "error" in report else f"{report['wall_seconds']:.1f}s"
+            print(f"Finished {report['file']} ({status})")
+            reports.append(report)
+    wall_seconds = time.perf_counter() - started
+
+    reports.sort(key=lambda r: r["file"])
+    print_report(reports, wall_seconds)
+    _write_json(os.path.join(args.output_dir, "report.json"),
+                {"wall_seconds": wall_seconds, "workers": workers, "files": reports})
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,14 @@
+import os
 from ui.app_window import NotiesApp
 
 if __name__ == "__main__":
-    app = NotiesApp()
+    # NOTIES_TRANSCRIPTION_WORKERS=N runs Whisper in N worker processes,
+    # NOTIES_STREAMING=1 shows partial transcripts while people speak,
+    # NOTIES_METRICS=1 adds a pipeline metrics panel, NOTIES_METRICS_PORT=9464
+    # serves Prometheus metrics and NOTIES_METRICS_LOG=path logs them as JSON lines
+    app = NotiesApp(transcription_workers=int(os.getenv("NOTIES_TRANSCRIPTION_WORKERS", "0")),
+                    streaming=os.getenv("NOTIES_STREAMING", "0") == "1",
+                    show_metrics=os.getenv("NOTIES_METRICS", "0") == "1",
+                    metrics_port=int(os.getenv("NOTIES_METRICS_PORT", "0")) or None,
+                    metrics_log=os.getenv("NOTIES_METRICS_LOG") or None)
     app.mainloop()
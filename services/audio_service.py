@@ -6,12 +6,158 @@ import time
 import soundfile as sf
 import tempfile
 import os
+from collections import deque
+from services.vad import PauseDetector
+
+class AudioChunk:
+    """
+    In-memory audio chunk handed from the recorder to the transcriber.
+
+    data is a float32 array of shape (frames,) or (frames, channels).
+    path is only set when the chunk was also spilled to a WAV file.
+    block_rms holds the RMS of each capture block (block_duration seconds
+    each) as computed by the audio callback, if available. queued_at is
+    when the recorder handed the chunk over (epoch seconds).
+    """
+    __slots__ = ("data", "sample_rate", "channels", "start_time", "path", "block_rms", "block_duration",
+                 "queued_at")
+
+    def __init__(self, data, sample_rate, channels=None, start_time=None, path=None,
+                 block_rms=None, block_duration=None, queued_at=None):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.channels = channels if channels is not None else (data.shape[1] if data.ndim > 1 else 1)
+        self.start_time = start_time
+        self.path = path
+        self.block_rms = block_rms
+        self.block_duration = block_duration
+        self.queued_at = queued_at
+
+    @property
+    def duration(self):
+        """Length of the chunk in seconds."""
+        return len(self.data) / float(self.sample_rate)
+
+    def __repr__(self):
+        return f"AudioChunk({self.duration:.1f}s, {self.sample_rate} Hz, {self.channels} ch)"
+
+
+class RingBuffer:
+    """
+    Preallocated float32 capture buffer made of fixed-size chunk slots.
+
+    The audio callback copies each block in with a single slice-assign.
+    Every chunk starts at a slot boundary, so a finished chunk is read out
+    as a contiguous view. The consumer calls release() once it is done with
+    a view; if it falls a whole ring behind, new blocks are dropped and
+    counted as overruns instead of overwriting unread audio.
+
+    A parallel array keeps one level (RMS) per written block so chunk
+    energies come out alongside the samples for free.
+    """
+    def __init__(self, slot_frames, channels, slots=3, block_frames=1024):
+        self.slot_frames = slot_frames
+        self.channels = channels
+        self.slots = slots
+        self.buffer = np.zeros((slot_frames * slots, channels), dtype=np.float32)
+        self.slot_blocks = -(-slot_frames // block_frames)
+        self.levels = np.zeros(self.slot_blocks * slots, dtype=np.float32)
+        self.slot = 0       # Slot currently being filled
+        self.fill = 0       # Frames written into the current slot
+        self.blocks = 0     # Levels written into the current slot
+        self.emitted = 0    # Only touched by the writer side
+        self.released = 0   # Only touched by the consumer side
+        self.overruns = 0
+
+    def write(self, block, level=None):
+        """
+        Copies a block (and its level) into the current slot.
+
+        Returns:
+            tuple: (samples view, levels view) of the finished chunk, or None
+        """
+        if self.fill == 0 and self.emitted - self.released >= self.slots:
+            # Consumer still holds every slot, drop the block
+            self.overruns += 1
+            return None
+
+        if level is not None and self.blocks < self.slot_blocks:
+            self.levels[self.slot * self.slot_blocks + self.blocks] = level
+            self.blocks += 1
+
+        frames = len(block)
+        n = min(frames, self.slot_frames - self.fill)
+        start = self.slot * self.slot_frames + self.fill
+        self.buffer[start:start + n] = block[:n]
+        self.fill += n
+
+        if self.fill < self.slot_frames:
+            return None
+        chunk = self.take()
+        if n < frames:
+            # Block straddled the slot boundary, the rest starts the next chunk
+            self.write(block[n:])
+        return chunk
+
+    def take(self):
+        """Closes the current chunk and returns (samples view, levels view), or None if empty."""
+        if self.fill == 0:
+            return None
+        start = self.slot * self.slot_frames
+        view = self.buffer[start:start + self.fill]
+        level_start = self.slot * self.slot_blocks
+        levels = self.levels[level_start:level_start + self.blocks]
+        self.slot = (self.slot + 1) % self.slots
+        self.fill = 0
+        self.blocks = 0
+        self.emitted += 1
+        return view, levels
+
+    def release(self):
+        """Marks the oldest handed-out view as consumed."""
+        self.released += 1
+
+    def discard(self):
+        """Drops the partially filled chunk."""
+        self.fill = 0
+        self.blocks = 0
+
 
 class AudioRecorder:
-    def __init__(self, chunk_duration=30):
+    # Capture rates tried by the "transcription" profile, in order of preference
+    TRANSCRIPTION_RATE = 16000
+    FALLBACK_RATES = (16000, 22050, 24000, 32000, 44100, 48000)
+
+    def __init__(self, chunk_duration=30, spill_to_disk=False, spill_dir=None, capture_profile="native",
+                 segmentation="fixed", min_chunk_duration=4, pause_duration=0.5):
+        """
+        Args:
+            chunk_duration: Seconds of audio per chunk (the hard maximum with VAD segmentation)
+            spill_to_disk: Also write every chunk to a WAV file (debugging / archiving)
+            spill_dir: Directory for spilled WAV files (defaults to the system temp dir)
+            capture_profile: "native" (device defaults first) or "transcription"
+                (16 kHz mono, or the closest rate the device supports)
+            segmentation: "fixed" (cut every chunk_duration) or "vad" (cut at the
+                first pause after min_chunk_duration, at most chunk_duration)
+            min_chunk_duration: Shortest chunk with VAD segmentation (seconds)
+            pause_duration: Silence that counts as a pause with VAD segmentation (seconds)
+        """
         self.chunk_duration = chunk_duration
+        self.segmentation = segmentation
+        self.min_chunk_duration = min_chunk_duration
+        self.pause_duration = pause_duration
+        self._pause_detector = None
+        self._min_chunk_frames = 0
+        self.capture_profile = capture_profile
+        self.stream_config = None # Negotiated stream settings, set once the stream opens
+        self.spill_to_disk = spill_to_disk
+        self.spill_dir = spill_dir
+        self.archive = None # Optional SessionArchive every chunk is appended to (writer thread)
+        self.journal = None # Optional Journal told about every archived chunk
+        self.metrics = None # Optional MetricsRegistry (capture->flush latency)
         self.sample_rate = 48000
         self.channels = 2
+        self.block_duration = 0.02  # Fixed PortAudio block size (seconds)
         self.running = False  # Stream is active
         self.capturing = False # Actually saving audio to file
         self.audio_queue = queue.Queue()
@@ -19,9 +165,20 @@ class AudioRecorder:
         self._stop_event = threading.Event()
         self.device_map = {}
         self.device_id = None
-        self.current_chunk_data = [] # Buffer for numpy arrays
-        self.chunk_start_time = 0
+        self._ring = None # Preallocated capture buffer (see _prepare_buffer)
+        # Chunk start times follow the captured frame count from when recording started
+        self._capture_origin = None # Epoch time of the first captured frame
+        self._chunk_start_frame = 0 # Frames captured (or dropped) before the chunk being filled
         self.current_level = 0
+        self.overflow_count = 0 # PortAudio input overflows (xruns)
+        
+        # Writer stage: the callback only signals chunk boundaries, the writer
+        # thread copies chunks out of the ring and does any file I/O.
+        self._boundary_queue = queue.SimpleQueue()
+        self._boundary_times = deque() # Boundary timestamps not yet handled by the writer
+        self._writer_thread = None
+        self._flush_requested = False
+        self._discard_requested = False
 
     def get_input_devices(self):
         """Returns a list of input device names."""
@@ -100,25 +257,28 @@ class AudioRecorder:
         self.capturing = False
         self._stop_event.clear()
         
-        # Reset buffer
-        self.current_chunk_data = []
-        self.chunk_start_time = time.time()
+        if self._writer_thread is None or not self._writer_thread.is_alive():
+            self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer_thread.start()
         
         self._thread = threading.Thread(target=self._record_loop)
         self._thread.start()
 
     def start_recording(self):
         """Enables saving audio to files."""
-        # Reset buffer on start
-        self.current_chunk_data = []
-        self.chunk_start_time = time.time()
+        # Reset buffer on start (done by the callback, which owns the ring)
+        self._discard_requested = True
+        if not self.running:
+            self._handle_requests()
         self.capturing = True
 
     def stop_recording(self):
         """Disables saving audio (stream continues for monitoring)."""
         self.capturing = False
-        # Flush last chunk if any
-        self._flush_chunk()
+        # Flush last chunk if any (on the next callback)
+        self._flush_requested = True
+        if not self.running:
+            self._handle_requests()
 
     def stop_stream(self):
         """Stops the audio stream entirely."""
@@ -128,10 +288,17 @@ class AudioRecorder:
         if self._thread:
             self._thread.join()
             self._thread = None
+        # Let the writer drain pending chunks, then stop it
+        if self._writer_thread:
+            self._boundary_queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
 
     def _audio_callback(self, indata, frames, time_info, status):
         """Callback for sounddevice InputStream."""
         if status:
+            if status.input_overflow:
+                self.overflow_count += 1
             print(status)
             
         if not self.running:
@@ -141,45 +308,153 @@ class AudioRecorder:
         rms = np.sqrt(np.mean(indata**2))
         self.current_level = min(100, int(rms * 1000))  # Scale to 0-100%
         
-        # 2. Only save data if CAPTURING
-        if self.capturing:
-            # Append copy of data to current chunk
-            self.current_chunk_data.append(indata.copy())
+        # 2. Pending flush/discard requests from the UI thread
+        if self._flush_requested or self._discard_requested:
+            self._handle_requests()
+        
+        # 3. Only save data if CAPTURING
+        ring = self._ring
+        if self.capturing and ring is not None:
+            if self._capture_origin is None:
+                self._capture_origin = time.time() - frames / float(self.sample_rate)
             
-            # Check if chunk duration has passed
-            if time.time() - self.chunk_start_time >= self.chunk_duration:
-                 self._flush_chunk()
+            # Single slice-assign into the ring; returns views once chunk_duration is filled
+            overruns = ring.overruns
+            finished = ring.write(indata, rms)
+            if ring.overruns != overruns:
+                # A dropped block is a gap in the audio: the next chunk starts after it
+                self._chunk_start_frame += frames
+            
+            # VAD segmentation: close early at the first pause after the minimum length
+            detector = self._pause_detector
+            if detector is not None:
+                in_pause = detector.update(rms)
+                if finished is None and in_pause and ring.fill >= self._min_chunk_frames:
+                    finished = ring.take()
+                if finished is not None:
+                    detector.reset()
+            
+            if finished is not None:
+                self._signal_boundary(finished)
+        elif self._pause_detector is not None:
+            # Learn the room's noise floor while only monitoring
+            self._pause_detector.observe(rms)
 
-    def _flush_chunk(self):
-        """Saves current buffer to file and resets."""
-        if not self.current_chunk_data:
-            return
+    def _handle_requests(self):
+        """Applies flush/discard requests. Runs wherever the ring is owned (callback, or caller when idle)."""
+        ring = self._ring
+        if self._flush_requested:
+            self._flush_requested = False
+            if ring is not None:
+                finished = ring.take()
+                if finished is not None:
+                    self._signal_boundary(finished)
+        if self._discard_requested:
+            self._discard_requested = False
+            if ring is not None:
+                ring.discard()
+            self._capture_origin = None
+            self._chunk_start_frame = 0
+            if self._pause_detector is not None:
+                self._pause_detector.reset()
+
+    def _signal_boundary(self, finished):
+        """Hands finished ring views to the writer stage (no copies or I/O here)."""
+        now = time.time()
+        origin = self._capture_origin if self._capture_origin is not None else now
+        start_time = origin + self._chunk_start_frame / float(self.sample_rate)
+        self._chunk_start_frame += len(finished[0])
+        self._boundary_times.append(now)
+        self._boundary_queue.put((self._ring, finished, self.sample_rate, start_time))
+
+    def _writer_loop(self):
+        """Writer/encoder stage: turns ring views into AudioChunks off the callback thread."""
+        while True:
+            item = self._boundary_queue.get()
+            if item is None:
+                break
+            ring, (view, levels), rate, start_time = item
+            try:
+                self._flush_chunk(view, levels, rate, start_time)
+            finally:
+                ring.release()
+            try:
+                self._boundary_times.popleft()
+            except IndexError:
+                pass
+
+    def get_writer_lag(self):
+        """
+        Returns how far the writer stage is behind the capture.
 
+        Returns:
+            tuple: (chunks waiting for the writer, seconds the oldest one has waited)
+        """
+        pending = len(self._boundary_times)
         try:
-            # Concatenate all numpy blocks
-            chunk_audio = np.concatenate(self.current_chunk_data, axis=0)
+            oldest = self._boundary_times[0]
+        except IndexError:
+            return 0, 0.0
+        return pending, max(0.0, time.time() - oldest)
+
+    def _prepare_buffer(self, rate, channels):
+        """Allocates the ring buffer for a stream configuration (reused if unchanged)."""
+        block = max(1, int(rate * self.block_duration))
+        blocks_per_chunk = max(1, int(round(self.chunk_duration / self.block_duration)))
+        slot_frames = block * blocks_per_chunk
+        ring = self._ring
+        if ring is None or ring.slot_frames != slot_frames or ring.channels != channels:
+            self._ring = RingBuffer(slot_frames, channels, block_frames=block)
+        if self.segmentation == "vad":
+            self._pause_detector = PauseDetector(self.block_duration, pause_duration=self.pause_duration)
+            self._min_chunk_frames = int(self.min_chunk_duration * rate)
+        self.sample_rate = rate
+        self.channels = channels
+        return block
+
+    def _flush_chunk(self, view, levels, sample_rate, start_time):
+        """Copies finished ring views into an AudioChunk and queues it (writer thread)."""
+        try:
+            # One copy out of the ring (already float32, no further copies downstream)
+            chunk_audio = view.copy()
+            chunk = AudioChunk(chunk_audio, sample_rate, start_time=start_time,
+                               block_rms=levels.copy(), block_duration=self.block_duration)
             
-            # Create temp file
-            fd, filename = tempfile.mkstemp(suffix=".wav")
-            os.close(fd)
+            # Optional spill/debug sink
+            if self.spill_to_disk:
+                chunk.path = self._spill_chunk(chunk_audio, sample_rate)
             
-            # Save using soundfile (efficiently handles float32)
-            sf.write(filename, chunk_audio, self.sample_rate)
+            print(f"Chunk created: {chunk}")
+            chunk.queued_at = time.time()
+            if self.metrics is not None:
+                # From the end of the chunk's audio to its hand-over
+                self.metrics.histogram("capture_to_flush_seconds", "Chunk end to hand-over to transcription").observe(
+                    max(0.0, chunk.queued_at - start_time - chunk.duration))
+            self.audio_queue.put(chunk)
             
-            print(f"Chunk created: {filename}")
-            self.audio_queue.put(filename)
+            # Optional session archive (compressed off the audio callback, after the hand-over)
+            if self.archive is not None:
+                self.archive.append_audio(chunk_audio, sample_rate, start_time)
+                # The audio is durable now, so a restart can re-transcribe it from the archive
+                if self.journal is not None:
+                    self.journal.record_captured(start_time, start_time, start_time + chunk.duration)
             
         except Exception as e:
             print(f"Error saving chunk: {e}")
             import traceback
-            traceback.print_exec()
-            
-        # Reset
-        self.current_chunk_data = []
-        self.chunk_start_time = time.time()
+            traceback.print_exc()
+
+    def _spill_chunk(self, chunk_audio, sample_rate):
+        """Writes a chunk to a WAV file and returns its path."""
+        fd, filename = tempfile.mkstemp(suffix=".wav", dir=self.spill_dir)
+        os.close(fd)
+        
+        # Save using soundfile (efficiently handles float32)
+        sf.write(filename, chunk_audio, sample_rate, subtype="FLOAT")
+        return filename
 
     def get_next_chunk(self):
-        """Returns path to the next audio chunk file."""
+        """Returns the next AudioChunk (or an error dict)."""
         try:
             return self.audio_queue.get(timeout=1) # Blocking with timeout
         except queue.Empty:
@@ -194,6 +469,10 @@ class AudioRecorder:
                 native_rate = int(dev_info.get('default_samplerate', 48000))
                 native_ch = max(1, dev_info.get('max_input_channels', 2))
                 
+                # PRIORITY 0: Transcription-native (16 kHz mono or closest supported)
+                if self.capture_profile == "transcription":
+                    candidates.extend(self._transcription_candidates(self.device_id))
+                
                 # PRIORITY 1: Native settings
                 candidates.append((self.device_id, native_rate, native_ch, 'float32', None))
                 
@@ -213,6 +492,8 @@ class AudioRecorder:
                 print(f"Could not query device {self.device_id}: {e}")
 
         # Fallbacks
+        if self.capture_profile == "transcription":
+            candidates.extend(self._transcription_candidates(None))
         candidates.append((None, 44100, 2, 'float32', None))
 
         stream = None
@@ -229,15 +510,24 @@ class AudioRecorder:
             
             try:
                 print(f"Attempting Stream: Dev={dev}, Rate={rate}, Ch={ch}, Dtype={dtype}, Settings={settings is not None}")
+                blocksize = self._prepare_buffer(rate, ch)
                 stream = sd.InputStream(samplerate=rate,
                                       device=dev,
                                       channels=ch,
                                       dtype=dtype,
+                                      blocksize=blocksize,
                                       extra_settings=settings,
                                       callback=self._audio_callback)
                 stream.start()
                 success_config = (dev, rate, ch, dtype, settings is not None)
-                self.sample_rate = rate 
+                self.stream_config = {
+                    "device": dev,
+                    "sample_rate": rate,
+                    "channels": ch,
+                    "dtype": dtype,
+                    "loopback": settings is not None,
+                    "profile": self.capture_profile,
+                }
                 print(f"SUCCESS! Recording with: {success_config}")
                 break
             except Exception as e:
@@ -266,11 +556,30 @@ class AudioRecorder:
             self.capturing = False
             if stream:
                 stream.close()
+            # Callback is gone, apply any flush it did not get to
+            self._handle_requests()
+
+    def _transcription_candidates(self, device):
+        """Mono candidates at the supported rates closest to 16 kHz (never below it)."""
+        candidates = []
+        rates = sorted(self.FALLBACK_RATES, key=lambda r: abs(r - self.TRANSCRIPTION_RATE))
+        for rate in rates:
+            try:
+                sd.check_input_settings(device=device, channels=1, dtype='float32', samplerate=rate)
+            except Exception:
+                continue
+            candidates.append((device, rate, 1, 'float32', None))
+        return candidates
 
     def get_audio_level(self):
         """Get the current audio level (0-100)."""
         return self.current_level
 
+    def get_overflow_count(self):
+        """Get the number of input overflows (xruns) plus dropped ring buffer blocks."""
+        ring = self._ring
+        return self.overflow_count + (ring.overruns if ring is not None else 0)
+
     def is_stream_active(self):
         """Check if audio stream is running."""
         return self.running
@@ -0,0 +1,91 @@
+import queue
+import time
+from bisect import bisect_left
+from collections import Counter
+
+
+class AdaptiveBatcher:
+    """
+    Pulls work from a queue in adaptive batches.
+
+    While the queue is idle every item is returned on its own. When the
+    backlog reaches depth_threshold, or the oldest item has waited longer
+    than latency_budget seconds, up to max_batch pending items are
+    coalesced into one batch.
+
+    Batch sizes, queue waits and batch latencies are counted here for
+    get_stats(); with a MetricsRegistry in metrics they are also observed
+    as histograms named after name (e.g. "llm_batching_queue_wait_seconds").
+    """
+    # Upper bounds (seconds) of the latency histogram buckets
+    LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, float("inf"))
+
+    def __init__(self, source, max_batch=4, depth_threshold=2, latency_budget=20.0, timestamp_of=None,
+                 name="batching"):
+        """
+        Args:
+            source: queue.Queue to pull from
+            max_batch: Largest batch returned
+            depth_threshold: Items still queued (after the first) that trigger batching
+            latency_budget: Seconds an item may wait before batching kicks in
+            timestamp_of: Optional callable returning an item's enqueue time (time.monotonic)
+            name: Prefix of the histograms observed in metrics
+        """
+        self.source = source
+        self.max_batch = max_batch
+        self.depth_threshold = depth_threshold
+        self.latency_budget = latency_budget
+        self.timestamp_of = timestamp_of
+        self.name = name
+        self.metrics = None # Optional MetricsRegistry
+        self.batch_sizes = Counter()
+        self.wait_histogram = [0] * len(self.LATENCY_BUCKETS)
+        self.latency_histogram = [0] * len(self.LATENCY_BUCKETS)
+
+    def next_batch(self, timeout=None):
+        """
+        Blocks for the next item and returns a list of one or more items.
+
+        Raises:
+            queue.Empty: if nothing arrived within timeout
+        """
+        first = self.source.get(timeout=timeout)
+        batch = [first]
+
+        now = time.monotonic()
+        waited = now - self.timestamp_of(first) if self.timestamp_of else 0.0
+        backlog = self.source.qsize()
+        if backlog >= self.depth_threshold or waited > self.latency_budget:
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.source.get_nowait())
+                except queue.Empty:
+                    break
+
+        self.batch_sizes[len(batch)] += 1
+        if self.metrics is not None:
+            self.metrics.histogram(f"{self.name}_batch_size", "Items per batch",
+                                   buckets=(*range(1, self.max_batch + 1), float("inf"))).observe(len(batch))
+        if self.timestamp_of:
+            for item in batch:
+                self._observe(self.wait_histogram, "queue_wait_seconds", "Item wait before its batch",
+                              now - self.timestamp_of(item))
+        return batch
+
+    def record_latency(self, seconds):
+        """Records how long processing one batch took."""
+        self._observe(self.latency_histogram, "batch_latency_seconds", "Batch processing time", seconds)
+
+    def _observe(self, histogram, metric, help_text, seconds):
+        histogram[bisect_left(self.LATENCY_BUCKETS, seconds)] += 1
+        if self.metrics is not None:
+            self.metrics.histogram(f"{self.name}_{metric}", help_text, buckets=self.LATENCY_BUCKETS).observe(seconds)
+
+    def get_stats(self):
+        """Batch size counts and latency histograms as {bucket upper bound: count}."""
+        buckets = [str(b) for b in self.LATENCY_BUCKETS]
+        return {
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "queue_wait_seconds": dict(zip(buckets, self.wait_histogram)),
+            "batch_latency_seconds": dict(zip(buckets, self.latency_histogram)),
+        }
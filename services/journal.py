@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+
+# Chunk states in processing order
+CAPTURED, TRANSCRIBED, SUMMARIZED = "captured", "transcribed", "summarized"
+STATE_ORDER = {CAPTURED: 0, TRANSCRIBED: 1, SUMMARIZED: 2}
+
+
+class Journal:
+    """
+    Append-only journal of chunk processing state (JSON lines).
+
+    Every chunk is keyed by its capture start time and moves through
+    captured -> transcribed -> summarized; replaying the journal tells a
+    restarted app what is still pending. Lines reach the OS on every
+    append (enough to survive an app crash); fsync, which also covers OS
+    crashes and power loss, is batched to at most one per fsync_interval
+    seconds.
+    """
+    def __init__(self, path, fsync_interval=1.0):
+        """
+        Args:
+            path: Journal file (replayed if it exists, then appended to)
+            fsync_interval: Seconds between batched fsyncs
+        """
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.chunks = {}        # key -> {"state", "start", "end", "text"}
+        self.summary_state = None
+        self.closed = False
+        self._replay()
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._file = open(path, "a", encoding="utf-8")
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def _replay(self):
+        """Applies the records on disk and cuts off a torn last line, so appends start clean."""
+        if not os.path.exists(self.path):
+            return
+        valid = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(record)
+                valid += len(line)
+        if valid < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid)
+
+    def _apply(self, record):
+        state = record["state"]
+        if state == "closed":
+            self.closed = True
+            return
+        self.closed = False
+        keys = record["keys"] if state == SUMMARIZED else [record["key"]]
+        for key in keys:
+            chunk = self.chunks.setdefault(key, {"state": state})
+            # States only move forward, whatever order the stages wrote them in
+            if STATE_ORDER[state] >= STATE_ORDER[chunk["state"]]:
+                chunk["state"] = state
+            for field in ("start", "end", "text"):
+                if field in record:
+                    chunk[field] = record[field]
+        if state == SUMMARIZED:
+            self.summary_state = {"summary": record["summary"], "router": record.get("router")}
+
+    def _append(self, record):
+        record["t"] = time.time()
+        with self._lock:
+            if self._file is None:
+                return
+            self._apply(record)
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._dirty = True
+
+    def record_captured(self, key, start, end):
+        """The chunk's audio is durable (in the session archive)."""
+        self._append({"state": CAPTURED, "key": key, "start": start, "end": end})
+
+    def record_transcribed(self, key, text):
+        """The chunk is transcribed; "" marks a chunk with nothing to summarize."""
+        self._append({"state": TRANSCRIBED, "key": key, "text": text})
+
+    def record_summarized(self, keys, summary, router_state=None):
+        """The chunks' text is in the summary; router_state lets a restart continue from it."""
+        self._append({"state": SUMMARIZED, "keys": list(keys), "summary": summary, "router": router_state})
+
+    def is_done(self, key):
+        chunk = self.chunks.get(key)
+        return chunk is not None and (chunk["state"] == SUMMARIZED or
+                                      (chunk["state"] == TRANSCRIBED and not chunk.get("text")))
+
+    def pending_audio(self):
+        """Chunks captured but never transcribed, as [(key, start, end)] in capture order."""
+        return sorted((key, c["start"], c["end"]) for key, c in self.chunks.items() if c["state"] == CAPTURED)
+
+    def pending_transcripts(self):
+        """Transcribed chunks still to be summarized, as [(key, text)] in capture order."""
+        return sorted((key, c["text"]) for key, c in self.chunks.items()
+                      if c["state"] == TRANSCRIBED and c.get("text"))
+
+    def has_pending(self):
+        with self._lock:
+            return any(not self.is_done(key) for key in self.chunks)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        """fsyncs appended records (batched: a no-op when nothing changed)."""
+        with self._lock:
+            if self._file is not None and self._dirty:
+                os.fsync(self._file.fileno())
+                self._dirty = False
+
+    def close(self):
+        """Stops the journal. Marks it closed (nothing to resume) unless work is still pending."""
+        if not self.has_pending():
+            self._append({"state": "closed"})
+        self._stop.set()
+        self.sync()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @staticmethod
+    def find_unfinished(directory, suffix=".journal"):
+        """The most recent journal in directory that was not closed, or None."""
+        if not os.path.isdir(directory):
+            return None
+        for name in sorted(os.listdir(directory), reverse=True):
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(directory, name)
+            last = None
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        last = line
+            if last is None:
+                continue
+            try:
+                if json.loads(last)["state"] != "closed":
+                    return path
+            except ValueError:
+                return path
+        return None
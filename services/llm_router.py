@@ -1,23 +1,62 @@
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
-import litellm
 import json
+from services.partial_json import partial_json_string
 
 load_dotenv(override=True)
 
+_litellm = None
+
+
+def get_litellm():
+    """Imports litellm on first use (it takes seconds to import) and configures it once."""
+    global _litellm
+    if _litellm is None:
+        import litellm
+        litellm.set_verbose = False  # Disable verbose logging
+        _litellm = litellm
+    return _litellm
+
+
 class LLMRouter:
-    def __init__(self, model_name="arcee-ai/trinity-mini:free"):
+    def __init__(self, model_name="arcee-ai/trinity-mini:free", context_mode="history", context_token_budget=6000,
+                 section_chunks=8, reduce_every=4, cache=None, api_base="https://openrouter.ai/api/v1",
+                 max_tokens=None):
         """
         Initialize LLM Router with flexible model support.
         
         Args:
             model_name: Model identifier for OpenRouter (e.g., "arcee-ai/trinity-mini:free", "google/gemini-1.5-flash")
+            context_mode: "history" (resend the chat history), "rolling" (send only the
+                system prompt, the current running summary and the new chunk) or
+                "hierarchical" (per-section notes, frozen when complete and
+                periodically merged into an overview)
+            context_token_budget: Max estimated prompt tokens per request; the oldest
+                history (or the start of the running summary) is dropped to fit
+            section_chunks: Chunks per section in hierarchical mode
+            reduce_every: Frozen sections merged per reduce step in hierarchical mode
+            cache: Optional ResponseCache; identical prompts are answered from it
+            api_base: OpenAI-compatible endpoint (OpenRouter by default; a local
+                server for offline testing and benchmarks)
+            max_tokens: Optional cap on reply tokens. History and rolling modes rewrite
+                the whole summary every call, so a cap must leave room for it; a reply
+                cut off at the cap is rejected rather than stored as the summary
         """
         self.model_name = model_name
+        self.context_mode = context_mode
+        self.context_token_budget = context_token_budget
+        self.section_chunks = section_chunks
+        self.reduce_every = reduce_every
+        self.cache = cache
+        self.max_tokens = max_tokens
+        # Every call reads the summary state and rewrites it when the reply arrives,
+        # so async calls on one router run one at a time (see aprocess_transcript)
+        self._session_lock = asyncio.Lock()
         self.chat_history = []
-        
-        # Configure LiteLLM for OpenRouter
-        litellm.set_verbose = False  # Disable verbose logging
+        self.running_summary = ""
+        self.usage = {}
         
         # Load API key from environment (stored as OPENAI_API_KEY for OpenRouter)
         self.api_key = os.getenv("OPENAI_API_KEY", "").strip()
@@ -31,7 +70,7 @@ class LLMRouter:
         # Ensure environment variable is set for LiteLLM internal usages
         os.environ["OPENAI_API_KEY"] = self.api_key
         
-        self.api_base = "https://openrouter.ai/api/v1"
+        self.api_base = api_base
         
         # System prompt for meeting summarization
         self.system_prompt = """
@@ -43,11 +82,36 @@ class LLMRouter:
         
         Output your response in this JSON format ONLY:
         {
-            "new_transcript": "The text from THIS chunk (repeat it).",
             "updated_summary": "The consolidated summary of the ENTIRE meeting so far."
         }
         """
         
+        # Hierarchical mode: notes for the current section only (map step)
+        self.section_prompt = """
+        You are a real-time meeting assistant. 
+        I will send you the notes for the CURRENT SECTION of a meeting and the next
+        transcribed chunk. Update the notes of this section only: keep decisions,
+        action items, names and numbers, and stay concise.
+        
+        Output your response in this JSON format ONLY:
+        {
+            "updated_summary": "The notes for the current section."
+        }
+        """
+        
+        # Hierarchical mode: merge finished sections into the overview (reduce step)
+        self.reduce_prompt = """
+        You are a meeting assistant. 
+        I will send you the overview of a long meeting so far and the notes of the
+        sections that followed it. Merge them into one updated overview of the ENTIRE
+        meeting, keeping decisions, action items and open questions.
+        
+        Output your response in this JSON format ONLY:
+        {
+            "updated_summary": "The consolidated overview of the meeting so far."
+        }
+        """
+        
         self.start_session()
     
     def start_session(self):
@@ -56,7 +120,300 @@ class LLMRouter:
             {"role": "system", "content": self.system_prompt},
             {"role": "assistant", "content": "Understood. I am ready to process the transcripts."}
         ]
+        self.running_summary = ""
+        self.usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "estimated_prompt_tokens": 0}
+        
+        # Hierarchical state
+        self.sections = []           # Frozen section notes
+        self.section_summary = ""    # Notes of the section in progress
+        self.section_chunk_count = 0
+        self.overview = ""           # Merged summary of sections[:reduced_sections]
+        self.reduced_sections = 0
+    
+    # Session state that export_state()/restore_state() carry across restarts
+    SESSION_STATE = ("chat_history", "running_summary", "usage", "sections", "section_summary",
+                     "section_chunk_count", "overview", "reduced_sections")
+    
+    def export_state(self):
+        """JSON-serializable snapshot of the session (summary, history and hierarchical state)."""
+        return {name: getattr(self, name) for name in self.SESSION_STATE}
     
+    def restore_state(self, state):
+        """Continues a session from an export_state() snapshot."""
+        self.start_session()
+        for name in self.SESSION_STATE:
+            if name in state:
+                setattr(self, name, state[name])
+    
+    def warm_up(self):
+        """Imports litellm ahead of the first request. Returns the seconds it took."""
+        started = time.perf_counter()
+        get_litellm()
+        return time.perf_counter() - started
+    
+    def count_tokens(self, messages):
+        """Estimates prompt tokens (litellm's tokenizer, ~4 chars/token as a fallback)."""
+        try:
+            return get_litellm().token_counter(model=f"openrouter/{self.model_name}", messages=messages)
+        except Exception:
+            return sum(len(m["content"]) for m in messages) // 4 + 4 * len(messages)
+    
+    def _build_messages(self, transcript_text):
+        """
+        Builds the prompt for one chunk within the token budget.
+        
+        Returns:
+            tuple: (messages to send, user message to record in the history)
+        """
+        if self.context_mode == "hierarchical":
+            # Fixed cost per chunk: only the open section's notes are sent
+            user_message = {
+                "role": "user",
+                "content": (f"Current section notes:\n\n{self.section_summary or '(new section)'}\n\n"
+                            f"Here is the next transcript chunk:\n\n{transcript_text}")
+            }
+            messages = [{"role": "system", "content": self.section_prompt}, user_message]
+            tokens = self.count_tokens(messages)
+        elif self.context_mode == "rolling":
+            summary = self.running_summary
+            while True:
+                user_message = {
+                    "role": "user",
+                    "content": (f"Running summary so far:\n\n{summary or '(none yet)'}\n\n"
+                                f"Here is the next transcript chunk:\n\n{transcript_text}")
+                }
+                messages = [{"role": "system", "content": self.system_prompt}, user_message]
+                tokens = self.count_tokens(messages)
+                if tokens <= self.context_token_budget or len(summary) < 200:
+                    break
+                # Over budget: keep the most recent part of the summary
+                summary = "..." + summary[len(summary) // 4:]
+        else:
+            user_message = {
+                "role": "user",
+                "content": f"Here is the next transcript chunk:\n\n{transcript_text}"
+            }
+            # System prompt + greeting always stay; drop the oldest exchanges to fit
+            head, tail = self.chat_history[:2], self.chat_history[2:]
+            while True:
+                messages = head + tail + [user_message]
+                tokens = self.count_tokens(messages)
+                if tokens <= self.context_token_budget or not tail:
+                    break
+                tail = tail[2:]
+            if len(tail) < len(self.chat_history) - 2:
+                self.chat_history = head + tail
+        
+        self.usage["estimated_prompt_tokens"] += tokens
+        return messages, user_message
+    
+    def _record_exchange(self, user_message, assistant_message, result, usage=None):
+        """Updates history, running summary and token accounting after a reply."""
+        if self.context_mode == "history":
+            self.chat_history.append(user_message)
+            self.chat_history.append({
+                "role": "assistant",
+                "content": assistant_message
+            })
+        summary = result.get("updated_summary")
+        if self.context_mode == "hierarchical":
+            if summary:
+                self.section_summary = summary
+            self.section_chunk_count += 1
+            if self.section_chunk_count >= self.section_chunks:
+                self._freeze_section()
+            result["section_summary"] = summary
+            summary = result["updated_summary"] = self.compose_summary()
+        if summary:
+            self.running_summary = summary
+        
+        self._record_usage(usage)
+    
+    def _record_usage(self, usage):
+        self.usage["requests"] += 1
+        if usage is not None:
+            self.usage["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            self.usage["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+    
+    def _freeze_section(self):
+        """Closes the section in progress; its notes are never rewritten afterwards."""
+        if self.section_summary:
+            self.sections.append(self.section_summary)
+        self.section_summary = ""
+        self.section_chunk_count = 0
+    
+    def _reduce_due(self, force=False):
+        pending = len(self.sections) - self.reduced_sections
+        return pending >= (1 if force else self.reduce_every)
+    
+    def _reduce_messages(self):
+        """Prompt merging the frozen, not yet reduced sections into the overview."""
+        notes = "\n\n".join(
+            f"Section {i}:\n{text}"
+            for i, text in enumerate(self.sections[self.reduced_sections:], start=self.reduced_sections + 1)
+        )
+        return [
+            {"role": "system", "content": self.reduce_prompt},
+            {"role": "user", "content": f"Overview so far:\n\n{self.overview or '(none yet)'}\n\nNew sections:\n\n{notes}"}
+        ]
+    
+    def _apply_reduce(self, assistant_message, usage):
+        result = self._parse_response(assistant_message, "")
+        if result.get("updated_summary"):
+            self.overview = result["updated_summary"]
+            self.reduced_sections = len(self.sections)
+        self._record_usage(usage)
+        self.running_summary = self.compose_summary()
+    
+    def _reduce(self, force=False):
+        """Runs the reduce step if enough sections are frozen (blocking)."""
+        if not self._reduce_due(force):
+            return
+        try:
+            self._apply_reduce(*self._complete(self._reduce_messages()))
+        except Exception as e:
+            print(f"LLM Router Reduce Error: {e}")
+    
+    async def _areduce(self, force=False):
+        """Async variant of _reduce."""
+        if not self._reduce_due(force):
+            return
+        try:
+            self._apply_reduce(*await self._acomplete(self._reduce_messages()))
+        except Exception as e:
+            print(f"LLM Router Reduce Error: {e}")
+    
+    def compose_summary(self, current_section=None):
+        """
+        Assembles the hierarchical summary locally: overview, frozen sections
+        not merged yet, then the section in progress.
+        """
+        parts = []
+        if self.overview:
+            parts.append(self.overview)
+        for i, text in enumerate(self.sections[self.reduced_sections:], start=self.reduced_sections + 1):
+            parts.append(f"Part {i}:\n{text}")
+        current = self.section_summary if current_section is None else current_section
+        if current:
+            parts.append(f"Part {len(self.sections) + 1} (in progress):\n{current}")
+        return "\n\n".join(parts)
+    
+    def finalize_summary(self):
+        """
+        Closes the open section and merges everything left into the overview.
+        Only in hierarchical mode; otherwise returns the running summary.
+        """
+        if self.context_mode == "hierarchical":
+            self._freeze_section()
+            self._reduce(force=True)
+            self.running_summary = self.compose_summary()
+        return self.running_summary
+    
+    def _completion_kwargs(self, messages):
+        """Arguments shared by the blocking and async completion calls."""
+        kwargs = dict(
+            model=f"openrouter/{self.model_name}",  # Prefix with openrouter/
+            messages=messages,
+            api_key=self.api_key,  # Explicitly pass the API key
+            api_base=self.api_base,
+            response_format={"type": "json_object"},
+            temperature=0.3,
+            # OpenRouter-specific headers
+            extra_headers={
+                "HTTP-Referer": "https://github.com/noties-app",  # Optional: your app URL
+                "X-Title": "Noties - AI Meeting Assistant"  # Optional: your app name
+            }
+        )
+        if self.max_tokens is not None:
+            kwargs["max_tokens"] = self.max_tokens
+        return kwargs
+
+    def _cache_key(self, messages):
+        if self.cache is None:
+            return None
+        kwargs = self._completion_kwargs(messages)
+        return self.cache.make_key(kwargs["model"], messages, temperature=kwargs["temperature"],
+                                   max_tokens=kwargs.get("max_tokens"), response_format=kwargs["response_format"])
+
+    def _complete(self, messages):
+        """
+        Blocking completion, answered from the cache when possible.
+        
+        Returns:
+            tuple: (reply text, usage or None for cache hits)
+        """
+        key = self._cache_key(messages)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached, None
+        
+        # Call LLM via litellm with OpenRouter configuration
+        response = get_litellm().completion(**self._completion_kwargs(messages))
+        choice = response.choices[0]
+        self._check_finished(getattr(choice, "finish_reason", None))
+        assistant_message = choice.message.content
+        if key is not None and assistant_message:
+            self.cache.put(key, assistant_message)
+        return assistant_message, getattr(response, "usage", None)
+
+    async def _acomplete(self, messages, on_delta=None):
+        """
+        Streaming async completion, answered from the cache when possible
+        (a cache hit is delivered to on_delta as a single delta).
+        
+        Returns:
+            tuple: (reply text, usage or None for cache hits)
+        """
+        key = self._cache_key(messages)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if on_delta:
+                    on_delta(cached, cached)
+                return cached, None
+        
+        response = await get_litellm().acompletion(stream=True, stream_options={"include_usage": True},
+                                                   **self._completion_kwargs(messages))
+        parts = []
+        usage = finish_reason = None
+        async for part in response:
+            usage = getattr(part, "usage", None) or usage
+            if not part.choices:
+                continue
+            finish_reason = getattr(part.choices[0], "finish_reason", None) or finish_reason
+            delta = part.choices[0].delta.content or ""
+            if not delta:
+                continue
+            parts.append(delta)
+            if on_delta:
+                on_delta(delta, "".join(parts))
+        self._check_finished(finish_reason)
+        assistant_message = "".join(parts)
+        if key is not None and assistant_message:
+            self.cache.put(key, assistant_message)
+        return assistant_message, usage
+
+    def _check_finished(self, finish_reason):
+        """Rejects a reply cut off at max_tokens: its JSON is incomplete and must not become the summary."""
+        if finish_reason == "length":
+            raise RuntimeError(f"Reply truncated at max_tokens={self.max_tokens}; summary left unchanged")
+
+    def _parse_response(self, assistant_message, transcript_text):
+        """Parses the model's JSON reply, falling back to the raw text."""
+        try:
+            result = json.loads(assistant_message)
+            # The transcript is no longer echoed by the model; fill it in locally
+            result.setdefault("new_transcript", transcript_text)
+            return result
+        except json.JSONDecodeError as e:
+            print(f"JSON Parse Error: {e}")
+            # Fallback: return raw text
+            return {
+                "new_transcript": transcript_text,
+                "updated_summary": assistant_message
+            }
+
     def process_transcript(self, transcript_text):
         """
         Send transcript to LLM for summarization.
@@ -71,48 +428,66 @@ class LLMRouter:
             return {"error": "Empty transcript"}
         
         try:
-            # Add user message to history
-            user_message = {
-                "role": "user",
-                "content": f"Here is the next transcript chunk:\n\n{transcript_text}"
-            }
-            self.chat_history.append(user_message)
-            
-            # Call LLM via litellm with OpenRouter configuration
-            response = litellm.completion(
-                model=f"openrouter/{self.model_name}",  # Prefix with openrouter/
-                messages=self.chat_history,
-                api_key=self.api_key,  # Explicitly pass the API key
-                api_base=self.api_base,
-                response_format={"type": "json_object"},
-                temperature=0.3,
-                # OpenRouter-specific headers
-                extra_headers={
-                    "HTTP-Referer": "https://github.com/noties-app",  # Optional: your app URL
-                    "X-Title": "Noties - AI Meeting Assistant"  # Optional: your app name
-                }
-            )
+            messages, user_message = self._build_messages(transcript_text)
             
-            # Extract response text
-            assistant_message = response.choices[0].message.content
+            # Call LLM (or the response cache) and extract the response text
+            assistant_message, usage = self._complete(messages)
             
-            # Add assistant response to history
-            self.chat_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
+            # Parse JSON response, then add the exchange to history
+            result = self._parse_response(assistant_message, transcript_text)
+            self._record_exchange(user_message, assistant_message, result, usage)
+            if self.context_mode == "hierarchical" and self._reduce_due():
+                self._reduce()
+                result["updated_summary"] = self.compose_summary()
+            return result
+        
+        except Exception as e:
+            print(f"LLM Router Error: {e}")
+            import traceback
+            traceback.print_exc()
+            return {"error": str(e)}
+
+    async def aprocess_transcript(self, transcript_text, on_token=None):
+        """
+        Async, streaming variant of process_transcript.
+
+        Uses litellm.acompletion, so the event loop stays free while the reply
+        streams in. Each call builds its prompt from the summary left by the
+        previous one, so calls on one router are serialized: a second call
+        waits for the first to finish. Summaries that should progress in
+        parallel need separate LLMRouter instances.
+        
+        Args:
+            transcript_text: Transcribed text from audio chunk
+            on_token: Optional callback(delta, partial_summary) run for every
+                streamed delta; partial_summary is the summary decoded so far
+                (None until the model starts writing it)
             
-            # Parse JSON response
-            try:
-                result = json.loads(assistant_message)
+        Returns:
+            dict: {"new_transcript": str, "updated_summary": str} or {"error": str}
+        """
+        if not transcript_text or not transcript_text.strip():
+            return {"error": "Empty transcript"}
+        
+        try:
+            async with self._session_lock:
+                messages, user_message = self._build_messages(transcript_text)
+                
+                def on_delta(delta, text_so_far):
+                    if on_token:
+                        partial = partial_json_string(text_so_far, "updated_summary")
+                        if partial is not None and self.context_mode == "hierarchical":
+                            partial = self.compose_summary(partial)
+                        on_token(delta, partial)
+                
+                assistant_message, usage = await self._acomplete(messages, on_delta)
+                
+                result = self._parse_response(assistant_message, transcript_text)
+                self._record_exchange(user_message, assistant_message, result, usage)
+                if self.context_mode == "hierarchical" and self._reduce_due():
+                    await self._areduce()
+                    result["updated_summary"] = self.compose_summary()
                 return result
-            except json.JSONDecodeError as e:
-                print(f"JSON Parse Error: {e}")
-                # Fallback: return raw text
-                return {
-                    "new_transcript": transcript_text,
-                    "updated_summary": assistant_message
-                }
         
         except Exception as e:
             print(f"LLM Router Error: {e}")
@@ -0,0 +1,201 @@
+import json
+import re
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) for pipeline latencies, from audio callback hand-offs to LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, float("inf"))
+# Upper bounds for real-time factors (processing seconds per audio second)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, float("inf"))
+
+
+class Counter:
+    """Monotonic count (events, tokens, seconds of audio)."""
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Bucketed distribution with sum and count; quantiles are estimated from the buckets."""
+    def __init__(self, name, help_text="", buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-quantile (0.0 when empty).
+
+        Like Prometheus, returns the largest finite bound when the quantile
+        falls in the +Inf bucket, so snapshots stay valid JSON.
+        """
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank, seen = q * total, 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if seen >= rank:
+                break
+        if bound == float("inf"):
+            finite = [b for b in self.buckets if b != float("inf")]
+            return finite[-1] if finite else 0.0
+        return bound
+
+    def snapshot(self):
+        with self._lock:
+            counts, total, value_sum = list(self.counts), self.count, self.sum
+        return {
+            "count": total,
+            "sum": value_sum,
+            "mean": value_sum / total if total else 0.0,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip((str(b) for b in self.buckets), counts)),
+        }
+
+
+def _flatten(prefix, value, out):
+    """Flattens nested stats dicts into {"a_b_c": number}."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}_{key}" if prefix else str(key), item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms updated on the hot paths, plus collectors:
+    callables returning (nested) stats dicts that are read only when
+    metrics are exported, so existing get_stats() methods cost nothing
+    until someone looks.
+    """
+    def __init__(self, namespace="noties"):
+        self.namespace = namespace
+        self.counters = {}
+        self.histograms = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text=""):
+        """Returns the counter called name, creating it on first use."""
+        with self._lock:
+            if name not in self.counters:
+                self.counters[name] = Counter(name, help_text)
+            return self.counters[name]
+
+    def histogram(self, name, help_text="", buckets=LATENCY_BUCKETS):
+        """Returns the histogram called name, creating it on first use."""
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(name, help_text, buckets)
+            return self.histograms[name]
+
+    def add_collector(self, name, collect):
+        """Registers collect() -> dict; its numbers are exported as gauges prefixed with name."""
+        self._collectors[name] = collect
+
+    def gauges(self):
+        values = {}
+        for name, collect in list(self._collectors.items()):
+            try:
+                _flatten(name, collect(), values)
+            except Exception as e:
+                print(f"Metrics collector '{name}' failed: {e}")
+        return values
+
+    def collect(self):
+        """Snapshot of everything as a JSON-serializable dict."""
+        return {
+            "time": time.time(),
+            "counters": {name: c.value for name, c in list(self.counters.items())},
+            "histograms": {name: h.snapshot() for name, h in list(self.histograms.items())},
+            "gauges": self.gauges(),
+        }
+
+    def _metric_name(self, name):
+        return f"{self.namespace}_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for c in list(self.counters.values()):
+            name = self._metric_name(c.name)
+            lines += [f"# HELP {name} {c.help}", f"# TYPE {name} counter", f"{name} {c.value}"]
+        for h in list(self.histograms.values()):
+            name = self._metric_name(h.name)
+            lines += [f"# HELP {name} {h.help}", f"# TYPE {name} histogram"]
+            with h._lock:
+                counts, total, value_sum = list(h.counts), h.count, h.sum
+            cumulative = 0
+            for bound, count in zip(h.buckets, counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f'{name}_bucket{{le="{le}"}} {cumulative}')
+            lines += [f"{name}_sum {value_sum}", f"{name}_count {total}"]
+        for key, value in self.gauges().items():
+            name = self._metric_name(key)
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Serves /metrics (Prometheus text) and /metrics.json on a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = registry.to_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(registry.collect()).encode("utf-8"), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # No per-scrape console noise
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Metrics at http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+    def start_json_log(self, path, interval=10.0):
+        """Appends a collect() snapshot as one JSON line to path every interval seconds."""
+        def log_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(self.collect()) + "\n")
+                except OSError as e:
+                    print(f"Metrics log error: {e}")
+
+        threading.Thread(target=log_loop, daemon=True).start()
@@ -0,0 +1,41 @@
+import json
+
+
+def partial_json_string(buffer, key):
+    """
+    Best-effort value of a string field in an incomplete JSON object.
+
+    Used while streaming: returns the characters of buffer[key] received so
+    far (None if the field has not started yet).
+    """
+    marker = buffer.find(f'"{key}"')
+    if marker < 0:
+        return None
+    colon = buffer.find(":", marker + len(key) + 2)
+    if colon < 0:
+        return None
+    quote = buffer.find('"', colon)
+    if quote < 0:
+        return None
+    
+    chars = []
+    i = quote + 1
+    while i < len(buffer):
+        c = buffer[i]
+        if c == "\\":
+            # Keep escapes whole; stop at one that is still incomplete
+            width = 6 if buffer[i + 1:i + 2] == "u" else 2
+            if i + width > len(buffer):
+                break
+            chars.append(buffer[i:i + width])
+            i += width
+            continue
+        if c == '"':
+            break
+        chars.append(c)
+        i += 1
+    
+    try:
+        return json.loads('"' + "".join(chars) + '"', strict=False)
+    except ValueError:
+        return None
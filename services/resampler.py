@@ -0,0 +1,95 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from functools import lru_cache
+from math import gcd
+
+WHISPER_RATE = 16000
+
+
+@lru_cache(maxsize=16)
+def _polyphase_filter(src_rate, dst_rate, zero_crossings=16, rolloff=0.92, beta=8.6):
+    """
+    Designs (and caches) a Kaiser-windowed sinc low-pass split into polyphase branches.
+
+    Returns:
+        tuple: (up, down, H, delay) where H has shape (up, taps_per_phase)
+    """
+    g = gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+
+    # Cut off below the lower of the two Nyquist rates, designed at the upsampled rate
+    half = zero_crossings * max(up, down)
+    n = np.arange(-half, half + 1)
+    cutoff = rolloff / (2.0 * max(up, down))
+    h = 2.0 * cutoff * np.sinc(2.0 * cutoff * n) * np.kaiser(len(n), beta) * up
+
+    # Branch p holds taps p, p + up, p + 2*up, ...
+    taps_per_phase = -(-len(h) // up)
+    padded = np.zeros(taps_per_phase * up)
+    padded[:len(h)] = h
+    H = np.ascontiguousarray(padded.reshape(taps_per_phase, up).T, dtype=np.float32)
+    H.setflags(write=False)
+    return up, down, H, half
+
+
+def is_whisper_format(audio, sample_rate, target_rate=WHISPER_RATE):
+    """True if audio is already mono float32 at the target rate (no conversion needed)."""
+    squeezed = audio.ndim == 1 or (audio.ndim == 2 and audio.shape[1] == 1)
+    return sample_rate == target_rate and squeezed and audio.dtype == np.float32
+
+
+def to_whisper_input(audio, sample_rate, target_rate=WHISPER_RATE, block=4096):
+    """
+    Downmixes, converts to float32 and resamples audio in a single pass.
+
+    audio is a (frames,) or (frames, channels) array. The input is
+    downmixed into one zero-padded float32 buffer, then every output is
+    the dot product of a window of it with one filter branch. Outputs that
+    share a branch read windows a fixed stride apart, so they are copied
+    into a contiguous block and filtered with one BLAS dot; scratch memory
+    stays bounded by block. If the input is already mono float32 at the
+    target rate it is returned as is.
+    """
+    audio = np.asarray(audio)
+    channels = audio.shape[1] if audio.ndim > 1 else 1
+
+    if sample_rate == target_rate:
+        if channels == 1:
+            return np.ascontiguousarray(audio.reshape(-1), dtype=np.float32)
+        return audio.mean(axis=1, dtype=np.float32)
+
+    up, down, H, delay = _polyphase_filter(int(sample_rate), int(target_rate))
+    taps = H.shape[1]
+    n_in = len(audio)
+    n_out = -(-n_in * up // down)
+    out = np.empty(n_out, dtype=np.float32)
+    if n_out == 0:
+        return out
+
+    # Window i of the padded signal holds input samples i - taps + 1 .. i
+    # (zeros past either edge of the input)
+    last = ((n_out - 1) * down + delay) // up
+    padded = np.zeros(max(n_in, last + 1) + taps - 1, dtype=np.float32)
+    mono = padded[taps - 1:taps - 1 + n_in]
+    if channels == 1:
+        mono[:] = audio.reshape(-1)
+    else:
+        # Column adds beat mean(axis=1) on interleaved frames by an order of magnitude
+        np.add(audio[:, 0], audio[:, 1], out=mono)
+        for c in range(2, channels):
+            mono += audio[:, c]
+        mono *= np.float32(1.0 / channels)
+    windows = sliding_window_view(padded, taps)
+    branches = np.ascontiguousarray(H[:, ::-1])
+
+    # Outputs r, r + up, r + 2*up, ... use the same branch and windows down samples apart
+    for r in range(min(up, n_out)):
+        t = r * down + delay
+        weights = branches[t % up]
+        first = t // up
+        target = out[r::up]
+        for start in range(0, len(target), block):
+            stop = min(start + block, len(target))
+            rows = windows[first + start * down:first + (stop - 1) * down + 1:down]
+            target[start:stop] = np.ascontiguousarray(rows) @ weights
+    return out
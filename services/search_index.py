@@ -0,0 +1,111 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from services.session_store import SessionReader
+
+
+class SearchIndex:
+    """
+    Full-text index of transcript segments across meetings (SQLite FTS5).
+
+    Segments are added as they are committed and carry their position in
+    the meeting (seconds since its start), so every hit maps back to the
+    audio in the meeting's session archive. Hits come newest first, which
+    FTS5 serves straight from its rowid order without ranking every match,
+    so queries stay in the low milliseconds across thousands of meetings.
+    """
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path: SQLite file of the index (":memory:" for a throwaway index)
+        """
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meetings ("
+            "id INTEGER PRIMARY KEY, archive TEXT UNIQUE, title TEXT, started REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5("
+            "text, meeting_id UNINDEXED, start UNINDEXED, end UNINDEXED, tokenize='porter unicode61')"
+        )
+        self._db.commit()
+
+    def add_meeting(self, archive, started, title=None):
+        """Registers a meeting (once per archive path). Returns its id."""
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO meetings (archive, title, started) VALUES (?, ?, ?)",
+                             (archive, title or time.strftime("%Y-%m-%d %H:%M", time.localtime(started)), started))
+            self._db.commit()
+            return self._db.execute("SELECT id FROM meetings WHERE archive = ?", (archive,)).fetchone()[0]
+
+    def add_segment(self, meeting_id, text, start, end):
+        """Indexes one committed transcript segment (start/end in seconds since the meeting start)."""
+        with self._lock:
+            self._db.execute("INSERT INTO segments (text, meeting_id, start, end) VALUES (?, ?, ?, ?)",
+                             (text, meeting_id, start, end))
+            self._db.commit()
+
+    def index_archive(self, path):
+        """Indexes the transcript of a session archive, unless it was indexed before. Returns the meeting id."""
+        with self._lock:
+            row = self._db.execute("SELECT id FROM meetings WHERE archive = ?", (path,)).fetchone()
+        if row is not None:
+            return row[0]
+
+        reader = SessionReader(path)
+        try:
+            meeting_id = self.add_meeting(path, reader.started)
+            with self._lock:
+                self._db.executemany("INSERT INTO segments (text, meeting_id, start, end) VALUES (?, ?, ?, ?)",
+                                     [(text, meeting_id, start, end) for start, end, text in reader.transcript()])
+                self._db.commit()
+            return meeting_id
+        finally:
+            reader.close()
+
+    @staticmethod
+    def _match_expression(query):
+        """Turns free text into an FTS5 query in which every word must match (after stemming)."""
+        words = re.findall(r"\w+", query)
+        if not words:
+            return None
+        return " ".join(f'"{word}"' for word in words)
+
+    def search(self, query, limit=20, meeting_id=None):
+        """
+        Finds segments matching every word of query, most recent first.
+
+        Returns:
+            list: [{"meeting_id", "archive", "title", "start", "end", "snippet"}]
+        """
+        expression = self._match_expression(query)
+        if expression is None:
+            return []
+        hits = ("SELECT rowid, meeting_id, start, end, snippet(segments, 0, '[', ']', '...', 12) AS snippet "
+                "FROM segments WHERE segments MATCH ?")
+        params = [expression]
+        if meeting_id is not None:
+            hits += " AND meeting_id = ?"
+            params.append(meeting_id)
+        hits += " ORDER BY rowid DESC LIMIT ?"
+        params.append(limit)
+        sql = ("SELECT s.meeting_id, m.archive, m.title, s.start, s.end, s.snippet "
+               f"FROM ({hits}) s JOIN meetings m ON m.id = s.meeting_id ORDER BY s.rowid DESC")
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        keys = ("meeting_id", "archive", "title", "start", "end", "snippet")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
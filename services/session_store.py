@@ -0,0 +1,241 @@
+import io
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from collections import namedtuple
+
+import numpy as np
+import soundfile as sf
+
+from services.resampler import to_whisper_input
+
+# Container layout:
+#   FILE_HEADER, then records (RECORD_HEADER + payload) in append order,
+#   then, once closed, an INDEX record and the TRAILER pointing at it.
+# An archive that was never closed (crash) is indexed by scanning the
+# record headers; a torn record at the end is dropped.
+MAGIC = b"NOTIESA1"
+FILE_HEADER = struct.Struct("<8sd")        # magic, session start (epoch seconds)
+RECORD_HEADER = struct.Struct("<4sIIdd")   # kind, payload length, payload CRC32, start, end (epoch seconds)
+INDEX_ENTRY = struct.Struct("<4sQIdd")     # kind, record offset, payload length, start, end
+TRAILER = struct.Struct("<Q8s")            # offset of the index record, magic
+
+AUDIO, TRANSCRIPT, SUMMARY, INDEX = b"AUDI", b"TEXT", b"SUMM", b"INDX"
+RECORD_KINDS = (AUDIO, TRANSCRIPT, SUMMARY)
+
+# soundfile settings of the audio codecs (Opus needs libsndfile >= 1.1)
+AUDIO_FORMATS = {
+    "flac": {"format": "FLAC", "subtype": "PCM_16"},
+    "opus": {"format": "OGG", "subtype": "OPUS"},
+}
+
+IndexEntry = namedtuple("IndexEntry", ["kind", "offset", "length", "start", "end"])
+
+
+def _load_index(f):
+    """
+    Reads the session start and the record index of an archive.
+
+    Returns:
+        tuple: (session start, [IndexEntry], end of the last record)
+    """
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    magic, started = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a Noties session archive")
+
+    # Closed archive: the trailer points at the index record
+    if size >= FILE_HEADER.size + RECORD_HEADER.size + TRAILER.size:
+        f.seek(size - TRAILER.size)
+        index_offset, trailer_magic = TRAILER.unpack(f.read(TRAILER.size))
+        if trailer_magic == MAGIC and index_offset < size:
+            f.seek(index_offset)
+            kind, length, crc, _, _ = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            payload = f.read(length)
+            if kind == INDEX and zlib.crc32(payload) == crc:
+                entries = [IndexEntry(*fields) for fields in INDEX_ENTRY.iter_unpack(payload)]
+                return started, entries, index_offset
+
+    # Otherwise scan the record headers
+    entries = []
+    offset = FILE_HEADER.size
+    while offset + RECORD_HEADER.size <= size:
+        f.seek(offset)
+        kind, length, crc, start, end = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+        if kind not in RECORD_KINDS or offset + RECORD_HEADER.size + length > size:
+            break
+        if zlib.crc32(f.read(length)) != crc:
+            break
+        entries.append(IndexEntry(kind, offset, length, start, end))
+        offset += RECORD_HEADER.size + length
+    return started, entries, offset
+
+
+class SessionArchive:
+    """
+    Append-only archive of one meeting: compressed audio chunks, transcript
+    segments and summaries in a single indexed container file.
+
+    Safe to call from several threads. Reopening an existing archive
+    appends to it.
+    """
+    def __init__(self, path, audio_format="flac", started=None):
+        """
+        Args:
+            path: Archive file (created if missing)
+            audio_format: "flac" (lossless) or "opus"
+            started: Session start (epoch seconds) for a new archive; defaults to now
+        """
+        self.path = path
+        self.audio_format = AUDIO_FORMATS[audio_format]
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, "r+b")
+            self.started, self.index, end = _load_index(self._file)
+            # Drop the old index and trailer (or a torn record); close() writes new ones
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, "w+b")
+            self.started = started if started is not None else time.time()
+            self.index = []
+            self._file.write(FILE_HEADER.pack(MAGIC, self.started))
+            self._file.flush()
+
+    def _append(self, kind, payload, start, end):
+        with self._lock:
+            if self._file is None:
+                return
+            offset = self._file.tell()
+            self._file.write(RECORD_HEADER.pack(kind, len(payload), zlib.crc32(payload), start, end))
+            self._file.write(payload)
+            self._file.flush()
+            self.index.append(IndexEntry(kind, offset, len(payload), start, end))
+
+    def append_audio(self, audio, sample_rate, start_time=None):
+        """Encodes and appends an audio chunk (float32, (frames,) or (frames, channels))."""
+        duration = len(audio) / float(sample_rate)
+        start = start_time if start_time is not None else time.time() - duration
+        buffer = io.BytesIO()
+        sf.write(buffer, np.clip(audio, -1.0, 1.0), sample_rate, **self.audio_format)
+        self._append(AUDIO, buffer.getvalue(), start, start + duration)
+
+    def append_transcript(self, text, start, end):
+        """Appends a transcript segment spanning start..end (epoch seconds)."""
+        self._append(TRANSCRIPT, json.dumps({"text": text}).encode("utf-8"), start, end)
+
+    def append_summary(self, summary, at=None):
+        """Appends the summary as of time at (epoch seconds, default now)."""
+        at = at if at is not None else time.time()
+        self._append(SUMMARY, json.dumps({"summary": summary}).encode("utf-8"), at, at)
+
+    def close(self):
+        """Writes the index and trailer. The archive can be reopened to append more."""
+        with self._lock:
+            if self._file is None:
+                return
+            payload = b"".join(INDEX_ENTRY.pack(*entry) for entry in self.index)
+            index_offset = self._file.tell()
+            self._file.write(RECORD_HEADER.pack(INDEX, len(payload), zlib.crc32(payload), 0.0, 0.0))
+            self._file.write(payload)
+            self._file.write(TRAILER.pack(index_offset, MAGIC))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+
+class SessionReader:
+    """
+    Random access to a session archive through mmap.
+
+    Times are seconds since the session start. Locating a region is a
+    bisect over the in-memory index; only the audio records overlapping
+    it are decoded.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self.started, entries, _ = _load_index(self._file)
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        def by_kind(kind):
+            return sorted((e for e in entries if e.kind == kind), key=lambda e: e.start)
+        self.audio_records = by_kind(AUDIO)
+        self.transcript_records = by_kind(TRANSCRIPT)
+        self.summary_records = by_kind(SUMMARY)
+        self._audio_starts = [e.start for e in self.audio_records]
+
+    @property
+    def duration(self):
+        """Seconds from the session start to the end of the last audio record."""
+        return self.audio_records[-1].end - self.started if self.audio_records else 0.0
+
+    def _payload(self, entry):
+        start = entry.offset + RECORD_HEADER.size
+        return self._mmap[start:start + entry.length]
+
+    def locate(self, start, end=None):
+        """Audio records overlapping start..end (a single instant if end is None)."""
+        abs_start = self.started + start
+        abs_end = self.started + (end if end is not None else start)
+        i = max(0, bisect_right(self._audio_starts, abs_start) - 1)
+        records = []
+        while i < len(self.audio_records) and self.audio_records[i].start <= abs_end:
+            entry = self.audio_records[i]
+            if entry.end > abs_start:
+                records.append(entry)
+            i += 1
+        return records
+
+    def read_audio(self, start, end):
+        """
+        Decodes the audio between start and end.
+
+        Pauses in the recording are skipped, not filled with silence.
+
+        Returns:
+            tuple: (float32 audio, sample_rate), or (None, None) if nothing was recorded then
+        """
+        parts, rate = [], None
+        for entry in self.locate(start, end):
+            data, entry_rate = sf.read(io.BytesIO(self._payload(entry)), dtype="float32")
+            first = max(0, int(round((self.started + start - entry.start) * entry_rate)))
+            last = max(first, int(round((self.started + end - entry.start) * entry_rate)))
+            data = data[first:last]
+            if rate is None:
+                rate = entry_rate
+            elif entry_rate != rate:
+                data = to_whisper_input(data, entry_rate, target_rate=rate)
+            parts.append(data)
+        if not parts:
+            return None, None
+        return np.concatenate(parts), rate
+
+    def transcript(self, start=None, end=None):
+        """Transcript segments as [(start, end, text)], optionally limited to a time range."""
+        segments = []
+        for entry in self.transcript_records:
+            seg_start, seg_end = entry.start - self.started, entry.end - self.started
+            if (start is None or seg_end > start) and (end is None or seg_start < end):
+                segments.append((seg_start, seg_end, json.loads(self._payload(entry))["text"]))
+        return segments
+
+    def latest_summary(self):
+        """The last summary recorded, or None."""
+        if not self.summary_records:
+            return None
+        return json.loads(self._payload(self.summary_records[-1]))["summary"]
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
@@ -0,0 +1,136 @@
+import numpy as np
+
+from services.resampler import WHISPER_RATE
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcription over a sliding window.
+
+    Short chunks (a second or two each) are appended to a buffer that
+    starts at the end of the last committed word, and the whole buffer is
+    re-decoded with word timestamps after every chunk. Words that ended
+    more than stability_margin seconds before the end of the audio are
+    committed as final text; the rest is returned as an unstable partial
+    hypothesis. Words are placed on an absolute timeline, so a word that
+    was already committed is never emitted again when overlapping windows
+    decode it a second time. A decode that comes back empty keeps the
+    previous hypothesis, so its words are still committed (at the latest
+    when they fall out of the window) before their audio is dropped.
+    """
+    def __init__(self, transcriber, window_duration=12.0, stability_margin=1.0, prompt_chars=200):
+        """
+        Args:
+            transcriber: WhisperTranscriber used for decoding
+            window_duration: Longest buffer decoded at once (seconds); older
+                uncommitted words are forced out as final text
+            stability_margin: Words ending within this many seconds of the end of
+                the audio stay partial
+            prompt_chars: Trailing characters of committed text passed as initial_prompt
+        """
+        self.transcriber = transcriber
+        self.window_duration = window_duration
+        self.stability_margin = stability_margin
+        self.prompt_chars = prompt_chars
+        self.reset()
+
+    def reset(self):
+        """Starts a new stream (time zero, nothing committed)."""
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0.0       # Stream time of buffer[0] (seconds)
+        self.committed_until = 0.0    # End of the last committed word
+        self.committed_text = ""
+        self.hypothesis = []          # Uncommitted words on the absolute timeline
+        self.last_commit_span = None  # (start, end) stream time of the last committed words
+        self.stats = {"decodes": 0, "decoded_seconds": 0.0, "committed_words": 0}
+
+    @property
+    def stream_end(self):
+        """Stream time of the end of the buffered audio."""
+        return self.buffer_start + len(self.buffer) / WHISPER_RATE
+
+    def process(self, chunk, has_speech=True):
+        """
+        Appends a chunk and re-decodes the window.
+
+        has_speech=False (e.g. the VAD found only silence) skips decoding when
+        nothing is pending and commits the pending hypothesis otherwise.
+
+        Returns:
+            tuple: (newly committed text, current partial text)
+        """
+        audio, _ = self.transcriber._load_audio(chunk)
+        if audio is None:
+            return "", self._text(self.hypothesis)
+        self.buffer = np.concatenate([self.buffer, audio.astype(np.float32, copy=False)])
+
+        if not has_speech and not self.hypothesis:
+            # Nothing to decode or finalize: drop the silence
+            self._trim(self.stream_end)
+            return "", ""
+
+        words = self._decode()
+        if not has_speech:
+            # Speech ended: everything heard so far is final
+            return self._commit(words), ""
+
+        # Commit the stable prefix; words about to fall out of the window are committed regardless
+        stable_until = self.stream_end - self.stability_margin
+        window_start = self.stream_end - self.window_duration
+        n = 0
+        while n < len(words) and (words[n]["end"] <= stable_until or words[n]["start"] < window_start):
+            n += 1
+        committed = self._commit(words[:n])
+        self.hypothesis = words[n:]
+        if self.buffer_start < window_start:
+            self._trim(window_start)
+        return committed, self._text(self.hypothesis)
+
+    def flush(self):
+        """Commits whatever is still pending (end of the stream). Returns the final text."""
+        words = self._decode() if len(self.buffer) else []
+        return self._commit(words)
+
+    def _decode(self):
+        """
+        Decodes the buffer. Returns the words not yet committed, on the absolute
+        timeline (the pending hypothesis if the decode found nothing).
+        """
+        prompt = self.committed_text[-self.prompt_chars:] or None
+        words = self.transcriber.transcribe_words(self.buffer, WHISPER_RATE, initial_prompt=prompt,
+                                                  condition_on_previous_text=False)
+        self.stats["decodes"] += 1
+        self.stats["decoded_seconds"] += len(self.buffer) / WHISPER_RATE
+
+        result = []
+        for w in words:
+            start, end = self.buffer_start + w["start"], self.buffer_start + w["end"]
+            # Overlap dedup: the word's midpoint lies in audio that was already committed
+            if (start + end) / 2 < self.committed_until:
+                continue
+            result.append({"word": w["word"], "start": start, "end": end})
+        return result or self.hypothesis
+
+    def _commit(self, words):
+        """Moves words into the committed text and drops their audio from the buffer."""
+        self.hypothesis = []
+        if not words:
+            return ""
+        text = self._text(words)
+        self.committed_text = (self.committed_text + " " + text).strip()
+        self.committed_until = words[-1]["end"]
+        self.last_commit_span = (words[0]["start"], words[-1]["end"])
+        self.stats["committed_words"] += len(words)
+        self._trim(self.committed_until)
+        return text
+
+    def _trim(self, until):
+        """Drops buffered audio before stream time until."""
+        drop = int(round((until - self.buffer_start) * WHISPER_RATE))
+        drop = min(max(drop, 0), len(self.buffer))
+        self.buffer = self.buffer[drop:]
+        self.buffer_start += drop / WHISPER_RATE
+
+    @staticmethod
+    def _text(words):
+        return "".join(w["word"] for w in words).strip()
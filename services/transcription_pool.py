@@ -0,0 +1,289 @@
+import multiprocessing
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _attach(name):
+    """Attaches to a segment owned (and unlinked) by the parent process."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the segment, but spawned workers share the parent's
+        # resource tracker, so the registration is a no-op and the parent's unlink clears it
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(tasks, results, model_size, backend):
+    """Worker process: loads its own model, then transcribes tasks until it gets None."""
+    from services.whisper_service import WhisperTranscriber
+
+    try:
+        # Chunks reach the workers out of order, so there is no previous chunk to prompt with
+        transcriber = WhisperTranscriber(model_size=model_size, backend=backend, carry_context=False)
+        transcriber.warm_up()
+        results.put((None, "ready", os.getpid()))
+    except Exception as e:
+        results.put((None, "error", str(e)))
+        return
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, payload = task
+        # Lets the parent fail this chunk if the process dies while on it
+        results.put((seq, "busy", os.getpid()))
+        text = None
+        try:
+            if isinstance(payload, str):
+                # Chunk spilled to disk by the recorder
+                text = transcriber.transcribe(payload)
+            else:
+                name, shape, dtype, sample_rate = payload
+                segment = _attach(name)
+                try:
+                    text = transcriber.transcribe(np.ndarray(shape, dtype=dtype, buffer=segment.buf), sample_rate)
+                finally:
+                    segment.close()
+        except Exception as e:
+            print(f"Worker {os.getpid()} Transcription Error: {e}")
+        results.put((seq, "text", text))
+
+
+class TranscriptionPool:
+    """
+    Whisper transcription across worker processes.
+
+    Each worker is a spawned process holding its own model, so decoding
+    runs outside the GIL of the UI process. Audio is copied once into a
+    shared memory segment per chunk (only its name and shape are pickled)
+    and texts come back through a reorder buffer in submission order.
+    A worker that dies mid-chunk fails that chunk (None) instead of
+    stalling the pool; the others carry on. A chunk the dead worker took
+    before it could report it is failed once the live workers have sat
+    idle for a POLL_INTERVAL with it still unclaimed. Offers the
+    transcribe_batch()/warm_up()/get_stats() interface of WhisperTranscriber.
+    """
+    # Seconds between liveness checks of the workers while waiting for results
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, workers=2, model_size="base", backend="openai"):
+        """
+        Args:
+            workers: Worker processes (each loads its own model)
+            model_size: Whisper model size for every worker
+            backend: Whisper backend name (see services.whisper_backends)
+        """
+        self.workers = workers
+        self.timings = {}
+        self.stats = {"chunks": 0, "discarded": 0}
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self._segments = {}    # seq -> SharedMemory owned by this process until the result arrives
+        self._reorder = {}     # seq -> text received ahead of its turn
+        self._next_seq = 0
+        self._next_result = 0
+        self._ready_workers = 0
+        self._ready_pids = set()
+        self._dead_pids = set()
+        self._in_flight = {}   # seq -> pid of the worker transcribing it
+        self._pending = set()  # Submitted seqs without a result yet
+        self._last_message = time.perf_counter()
+        self._processes = [
+            self._context.Process(target=_worker_main, args=(self._tasks, self._results, model_size, backend),
+                                  daemon=True)
+            for _ in range(workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+    def warm_up(self, timeout=None):
+        """Blocks until every worker has loaded its model. Raises RuntimeError if one failed."""
+        started = time.perf_counter()
+        while self._ready_workers < self.workers:
+            remaining = None if timeout is None else max(0.0, timeout - (time.perf_counter() - started))
+            self._receive(remaining)
+        self.timings["workers_ready"] = time.perf_counter() - started
+
+    def submit(self, chunk):
+        """
+        Queues an AudioChunk, (audio, sample_rate) tuple or file path.
+
+        Returns:
+            int: Sequence number; results are returned in this order
+        """
+        seq = self._next_seq
+        self._next_seq += 1
+        self._pending.add(seq)
+
+        if isinstance(chunk, (str, os.PathLike)):
+            self._tasks.put((seq, os.fspath(chunk)))
+            return seq
+
+        if hasattr(chunk, "sample_rate"):
+            audio, sample_rate = chunk.data, chunk.sample_rate
+        else:
+            audio, sample_rate = chunk
+        audio = np.asarray(audio)
+        segment = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+        np.ndarray(audio.shape, dtype=audio.dtype, buffer=segment.buf)[...] = audio
+        self._segments[seq] = segment
+        self._tasks.put((seq, (segment.name, audio.shape, audio.dtype.str, sample_rate)))
+        return seq
+
+    def get(self, timeout=None):
+        """
+        Returns the next text in submission order (None for failed chunks).
+
+        Raises:
+            queue.Empty: if it did not arrive within timeout
+        """
+        started = time.perf_counter()
+        while self._next_result not in self._reorder:
+            remaining = None if timeout is None else max(0.0, timeout - (time.perf_counter() - started))
+            self._receive(remaining)
+        text = self._reorder.pop(self._next_result)
+        self._next_result += 1
+        self.stats["chunks"] += 1
+        if text == "":
+            self.stats["discarded"] += 1
+        return text
+
+    def reset_context(self):
+        """Workers carry no prompt context (see _worker_main); nothing to reset."""
+
+    def get_stats(self):
+        """Chunk counters plus the share of chunks the workers discarded as hallucinations."""
+        stats = dict(self.stats)
+        stats["discard_ratio"] = stats["discarded"] / stats["chunks"] if stats["chunks"] else 0.0
+        return stats
+
+    def transcribe_batch(self, chunks):
+        """Transcribes chunks in parallel across the workers. Returns texts in the order of chunks."""
+        seqs = [self.submit(chunk) for chunk in chunks]
+        try:
+            return [self.get() for _ in seqs]
+        except Exception:
+            if seqs:
+                self._skip_to(seqs[-1] + 1)
+            raise
+
+    def _skip_to(self, seq):
+        """Gives up on results before seq, so the next get() returns seq's (late ones are dropped)."""
+        for skipped in range(self._next_result, seq):
+            self._reorder.pop(skipped, None)
+        self._next_result = max(self._next_result, seq)
+
+    def _receive(self, timeout):
+        """
+        Handles one message from the workers (or the death of one), checking
+        every POLL_INTERVAL that they are still alive.
+
+        Raises:
+            queue.Empty: if nothing happened within timeout
+            RuntimeError: if a worker failed to start or none is left
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            wait = self.POLL_INTERVAL
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.perf_counter()))
+            try:
+                message = self._results.get(timeout=wait)
+            except queue.Empty:
+                if self._check_workers() or self._fail_orphans():
+                    return
+                if deadline is not None and time.perf_counter() >= deadline:
+                    raise
+                continue
+            self._handle(*message)
+            return
+
+    def _handle(self, seq, kind, value):
+        self._last_message = time.perf_counter()
+        if kind == "ready":
+            self._ready_workers += 1
+            self._ready_pids.add(value)
+            print(f"Transcription worker ready ({self._ready_workers}/{self.workers})")
+        elif kind == "error":
+            raise RuntimeError(f"Transcription worker failed to start: {value}")
+        elif kind == "busy":
+            if seq in self._pending:
+                self._in_flight[seq] = value
+        else:
+            self._in_flight.pop(seq, None)
+            self._resolve(seq, value)
+
+    def _resolve(self, seq, text):
+        if seq not in self._pending:
+            return  # Already failed as an orphan
+        segment = self._segments.pop(seq, None)
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+        self._pending.discard(seq)
+        if seq >= self._next_result:
+            self._reorder[seq] = text
+
+    def _check_workers(self):
+        """Fails the chunks of workers that died. Returns True if any did."""
+        dead = [p for p in self._processes if not p.is_alive() and p.pid not in self._dead_pids]
+        if not dead:
+            return False
+        # Whatever they sent before dying may still be queued
+        while True:
+            try:
+                self._handle(*self._results.get_nowait())
+            except queue.Empty:
+                break
+        for process in dead:
+            self._dead_pids.add(process.pid)
+            print(f"Transcription worker {process.pid} exited (code {process.exitcode})")
+            if process.pid not in self._ready_pids:
+                raise RuntimeError(f"Transcription worker failed to start (exit code {process.exitcode})")
+            for seq, pid in list(self._in_flight.items()):
+                if pid == process.pid:
+                    del self._in_flight[seq]
+                    self._resolve(seq, None)
+        if len(self._dead_pids) == len(self._processes):
+            raise RuntimeError("All transcription workers exited")
+        return True
+
+    def _fail_orphans(self):
+        """
+        Fails chunks taken by a worker that died before reporting them (None).
+
+        Tasks are taken in submission order and a worker reports every task
+        as soon as it takes one, so once a worker has died and the live ones
+        have been idle for a whole POLL_INTERVAL, nothing still unclaimed is
+        left in the task queue. Returns True if any chunk was failed.
+        """
+        if not self._dead_pids or self._in_flight:
+            return False
+        if any(p.pid not in self._ready_pids for p in self._processes if p.pid not in self._dead_pids):
+            return False  # A live worker is still loading and has not taken anything yet
+        if time.perf_counter() - self._last_message < self.POLL_INTERVAL:
+            return False
+        orphans = sorted(self._pending)
+        for seq in orphans:
+            print(f"Transcription chunk {seq} was lost with its worker")
+            self._resolve(seq, None)
+        return bool(orphans)
+
+    def close(self, timeout=5):
+        """Stops the workers and releases any outstanding shared memory."""
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for segment in self._segments.values():
+            segment.close()
+            segment.unlink()
+        self._segments.clear()
@@ -0,0 +1,201 @@
+import numpy as np
+
+
+class EnergyVAD:
+    """
+    Cheap energy-based voice activity gate run before Whisper.
+
+    Reuses the per-block RMS the recorder already computes in its audio
+    callback (AudioChunk.block_rms) and only computes frame energies itself
+    for chunks that carry none. Chunks without enough speech are skipped;
+    the rest have leading and trailing silence trimmed.
+    """
+    def __init__(self, frame_duration=0.02, min_rms=0.004, noise_ratio=3.0,
+                 min_speech_ratio=0.05, min_speech_duration=0.3, hangover=0.3, padding=0.2):
+        """
+        Args:
+            frame_duration: Frame length when energies must be computed here (seconds)
+            min_rms: Absolute floor of the speech threshold
+            noise_ratio: Speech threshold as a multiple of the tracked noise floor
+            min_speech_ratio: Minimum fraction of speech frames to keep a chunk
+            min_speech_duration: Minimum seconds of speech to keep a chunk
+            hangover: Seconds a speech decision is held after energy drops
+            padding: Seconds of context kept around the trimmed speech region
+        """
+        self.frame_duration = frame_duration
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.min_speech_ratio = min_speech_ratio
+        self.min_speech_duration = min_speech_duration
+        self.hangover = hangover
+        self.padding = padding
+        self.noise_floor = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clears the per-session counters."""
+        self.stats = {
+            "chunks": 0,
+            "skipped": 0,
+            "audio_seconds": 0.0,
+            "speech_seconds": 0.0,
+            "trimmed_seconds": 0.0,
+            "last_speech_ratio": 0.0,
+        }
+
+    def frame_energies(self, chunk):
+        """Returns (per-frame RMS, frame duration in seconds) for an AudioChunk."""
+        if chunk.block_rms is not None and len(chunk.block_rms):
+            return np.asarray(chunk.block_rms, dtype=np.float32), chunk.block_duration
+
+        data = chunk.data
+        frame = max(1, int(chunk.sample_rate * self.frame_duration))
+        n_frames = len(data) // frame
+        if n_frames == 0:
+            return np.zeros(0, dtype=np.float32), self.frame_duration
+        frames = data[:n_frames * frame].reshape(n_frames, -1)
+        energy = np.einsum("ij,ij->i", frames, frames) / frames.shape[1]
+        return np.sqrt(energy, dtype=np.float32), frame / float(chunk.sample_rate)
+
+    def threshold(self, energies):
+        """Speech threshold from a noise floor tracked across chunks."""
+        floor = float(np.percentile(energies, 10))
+        if self.noise_floor is None or floor < self.noise_floor:
+            self.noise_floor = floor
+        else:
+            # Rise slowly so a chunk full of speech does not become the new floor
+            self.noise_floor += 0.05 * (floor - self.noise_floor)
+        return max(self.min_rms, self.noise_floor * self.noise_ratio)
+
+    def analyze(self, chunk):
+        """
+        Scores a chunk.
+
+        Returns:
+            dict: {"is_speech": bool, "speech_ratio": float, "start": int, "end": int}
+                  where start/end are the sample bounds of the speech region
+        """
+        energies, frame_duration = self.frame_energies(chunk)
+        n_samples = len(chunk.data)
+        if len(energies) == 0:
+            return {"is_speech": False, "speech_ratio": 0.0, "start": 0, "end": 0}
+
+        speech = energies > self.threshold(energies)
+        speech_ratio = float(speech.mean())
+        speech_seconds = float(speech.sum()) * frame_duration
+        is_speech = speech_ratio >= self.min_speech_ratio and speech_seconds >= self.min_speech_duration
+        if not is_speech:
+            return {"is_speech": False, "speech_ratio": speech_ratio, "start": 0, "end": 0}
+
+        # Hold each speech frame for the hangover so word tails are not cut
+        hold = max(1, int(round(self.hangover / frame_duration)))
+        held = np.convolve(speech, np.ones(hold, dtype=bool), mode="full")[:len(speech)] > 0
+        voiced = np.flatnonzero(held)
+
+        frame_samples = chunk.sample_rate * frame_duration
+        pad = int(self.padding * chunk.sample_rate)
+        start = max(0, int(voiced[0] * frame_samples) - pad)
+        end = min(n_samples, int((voiced[-1] + 1) * frame_samples) + pad)
+        return {"is_speech": True, "speech_ratio": speech_ratio, "start": start, "end": end}
+
+    def process(self, chunk):
+        """
+        Gates and trims an AudioChunk.
+
+        Returns:
+            AudioChunk: trimmed chunk (a view, no copy), or None if it holds no speech
+        """
+        result = self.analyze(chunk)
+        duration = chunk.duration
+        self.stats["chunks"] += 1
+        self.stats["audio_seconds"] += duration
+        self.stats["last_speech_ratio"] = result["speech_ratio"]
+
+        if not result["is_speech"]:
+            self.stats["skipped"] += 1
+            print(f"VAD: skipping chunk (speech ratio {result['speech_ratio']:.0%})")
+            return None
+
+        start, end = result["start"], result["end"]
+        trimmed_seconds = (len(chunk.data) - (end - start)) / float(chunk.sample_rate)
+        self.stats["speech_seconds"] += duration - trimmed_seconds
+        self.stats["trimmed_seconds"] += trimmed_seconds
+        if start == 0 and end == len(chunk.data):
+            return chunk
+
+        block_rms = None
+        if chunk.block_rms is not None and chunk.block_duration:
+            first = int(start / (chunk.sample_rate * chunk.block_duration))
+            last = -(-end // int(chunk.sample_rate * chunk.block_duration))
+            block_rms = chunk.block_rms[first:last]
+        start_time = chunk.start_time + start / float(chunk.sample_rate) if chunk.start_time else chunk.start_time
+        return type(chunk)(chunk.data[start:end], chunk.sample_rate, channels=chunk.channels,
+                           start_time=start_time, path=chunk.path,
+                           block_rms=block_rms, block_duration=chunk.block_duration,
+                           queued_at=chunk.queued_at)
+
+    def get_stats(self):
+        """Returns a copy of the counters plus derived skip and speech ratios."""
+        stats = dict(self.stats)
+        stats["skip_ratio"] = stats["skipped"] / stats["chunks"] if stats["chunks"] else 0.0
+        stats["speech_ratio"] = (stats["speech_seconds"] / stats["audio_seconds"]
+                                 if stats["audio_seconds"] else 0.0)
+        return stats
+
+
+class PauseDetector:
+    """
+    Per-block pause tracker for the audio callback (scalar math only).
+
+    Reports a pause once pause_duration seconds of low energy follow
+    speech. The noise floor starts where the speech threshold equals
+    min_rms, so recording that begins mid-sentence is still heard as
+    speech. It falls immediately to any quieter block and rises only
+    towards the quietest block of each floor_window (the gaps between
+    words), so a long stretch of talking does not become the new floor
+    while a noisy room still lifts it within a few windows. Blocks seen
+    while only monitoring can be fed to observe() to learn the room first.
+    """
+    def __init__(self, block_duration, pause_duration=0.5, min_rms=0.004, noise_ratio=3.0,
+                 floor_window=1.0, floor_rise=0.2):
+        self.pause_blocks = max(1, int(round(pause_duration / block_duration)))
+        self.window_blocks = max(1, int(round(floor_window / block_duration)))
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.floor_rise = floor_rise
+        self.noise_floor = min_rms / noise_ratio
+        self._window_min = float("inf")
+        self._window_count = 0
+        self.reset()
+
+    def reset(self):
+        """Starts a new chunk (the noise floor is kept)."""
+        self.silent_blocks = 0
+        self.heard_speech = False
+
+    def threshold(self):
+        return max(self.min_rms, self.noise_floor * self.noise_ratio)
+
+    def observe(self, rms):
+        """Tracks the noise floor from a block outside any chunk (e.g. while only monitoring)."""
+        if rms < self.noise_floor:
+            self.noise_floor = rms
+        self._window_min = min(self._window_min, rms)
+        self._window_count += 1
+        if self._window_count >= self.window_blocks:
+            if self._window_min > self.noise_floor:
+                self.noise_floor += self.floor_rise * (self._window_min - self.noise_floor)
+            self._window_min = float("inf")
+            self._window_count = 0
+
+    def update(self, rms):
+        """Feeds one block level. Returns True while in a pause that follows speech."""
+        is_speech = rms > self.threshold()
+        self.observe(rms)
+
+        if is_speech:
+            self.silent_blocks = 0
+            self.heard_speech = True
+        else:
+            self.silent_blocks += 1
+        return self.heard_speech and self.silent_blocks >= self.pause_blocks
@@ -0,0 +1,143 @@
+# Whisper decodes fixed 30 s windows of 16 kHz audio
+WINDOW_SAMPLES = 30 * 16000
+
+
+class OpenAIWhisperBackend:
+    """Reference openai-whisper engine (PyTorch, FP32 on CPU)."""
+    name = "openai"
+
+    @staticmethod
+    def import_engine():
+        """Imports the engine's (heavy) modules; deferred until a backend is needed."""
+        import whisper
+        return whisper
+
+    def __init__(self, model_size, device=None):
+        whisper = self.import_engine()
+        self._whisper = whisper
+        self.model = whisper.load_model(model_size, device=device)
+
+    def transcribe(self, audio, **options):
+        """
+        Transcribes 16 kHz mono float32 audio.
+
+        Returns:
+            dict: {"text": str, "segments": [{"start", "end", "text", "avg_logprob",
+                   "no_speech_prob", "compression_ratio", ...}]}
+        """
+        options.setdefault("fp16", False)
+        return self.model.transcribe(audio, **options)
+
+    def transcribe_batch(self, audios, prompt=None, **options):
+        """
+        Greedily decodes clips of up to 30 s together in one encoder/decoder pass.
+
+        options are transcribe()'s decoding settings; the single greedy pass
+        has no temperature fallback or thresholds to apply them to (callers
+        re-decode clips that fail the thresholds through transcribe()).
+
+        Returns:
+            list: One {"text", "segments"} result per clip, each with a single
+                  segment spanning the clip
+        """
+        import torch
+        whisper = self._whisper
+
+        mels = [whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+                for audio in audios]
+        batch = torch.stack(mels).to(self.model.device)
+        options = whisper.DecodingOptions(fp16=False, without_timestamps=True, prompt=prompt)
+        return [{
+            "text": result.text,
+            "segments": [{
+                "text": result.text,
+                "avg_logprob": result.avg_logprob,
+                "no_speech_prob": result.no_speech_prob,
+                "compression_ratio": result.compression_ratio,
+                "temperature": result.temperature,
+            }],
+        } for result in whisper.decode(self.model, batch, options)]
+
+
+class QuantizedTorchBackend(OpenAIWhisperBackend):
+    """openai-whisper with its Linear layers dynamically quantized to int8 (CPU only)."""
+    name = "torch-int8"
+
+    def __init__(self, model_size, device=None):
+        import torch
+        super().__init__(model_size, device="cpu")
+
+        # whisper.model.Linear only adds a dtype cast in forward(); turn it back into a plain
+        # nn.Linear so quantize_dynamic recognizes it
+        for module in self.model.modules():
+            if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+                module.__class__ = torch.nn.Linear
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class FasterWhisperBackend:
+    """CTranslate2 engine via faster-whisper, int8 on CPU by default."""
+    name = "faster-whisper"
+
+    # openai-whisper option names that differ in faster-whisper
+    OPTION_ALIASES = {"logprob_threshold": "log_prob_threshold"}
+    UNSUPPORTED_OPTIONS = ("fp16", "verbose")
+
+    @staticmethod
+    def import_engine():
+        import faster_whisper
+        return faster_whisper
+
+    def __init__(self, model_size, device="cpu", compute_type="int8"):
+        WhisperModel = self.import_engine().WhisperModel
+        self.model = WhisperModel(model_size, device=device or "cpu", compute_type=compute_type)
+
+    def transcribe(self, audio, **options):
+        """Same contract as OpenAIWhisperBackend.transcribe."""
+        for key in self.UNSUPPORTED_OPTIONS:
+            options.pop(key, None)
+        for key, alias in self.OPTION_ALIASES.items():
+            if key in options:
+                options[alias] = options.pop(key)
+        if isinstance(options.get("temperature"), tuple):
+            options["temperature"] = list(options["temperature"])
+
+        segments, info = self.model.transcribe(audio, **options)
+        result_segments = []
+        for seg in segments:
+            result_segments.append({
+                "id": seg.id,
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "avg_logprob": seg.avg_logprob,
+                "no_speech_prob": seg.no_speech_prob,
+                "compression_ratio": seg.compression_ratio,
+                "temperature": seg.temperature,
+                "words": [{"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                          for w in (seg.words or [])],
+            })
+        return {
+            "text": "".join(seg["text"] for seg in result_segments),
+            "segments": result_segments,
+            "language": info.language,
+        }
+
+    def transcribe_batch(self, audios, prompt=None, **options):
+        """CTranslate2 already runs multi-threaded per clip; clips are decoded in turn with the same options."""
+        return [self.transcribe(audio, initial_prompt=prompt, **options) for audio in audios]
+
+
+BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+
+def get_backend_class(name):
+    """Looks up a backend class by name ("openai", "torch-int8" or "faster-whisper")."""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown Whisper backend '{name}'. Choose from: {', '.join(BACKENDS)}")
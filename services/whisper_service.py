@@ -1,74 +1,329 @@
-import whisper
 import os
+import re
+import threading
+import time
 import soundfile as sf
 import numpy as np
+from services.resampler import is_whisper_format, to_whisper_input
+from services.whisper_backends import WINDOW_SAMPLES, get_backend_class
+
+# Decoding options for 4-15 s chunks
+DEFAULT_DECODE_OPTIONS = {
+    # Greedy first; a decode that fails the checks below is retried at a higher temperature
+    "temperature": (0.0, 0.4, 0.8),
+    "compression_ratio_threshold": 2.4,   # Repetition loops compress well
+    "logprob_threshold": -1.0,
+    "no_speech_threshold": 0.6,
+    # Context between chunks comes from initial_prompt; conditioning within a chunk feeds loops
+    "condition_on_previous_text": False,
+}
+
+# Text Whisper tends to produce for silence and noise
+HALLUCINATION_MARKERS = ("1.5%", "2.5%", "1-2-3-4")
+# A text this long whose most common word makes up this share of it is a repetition loop
+LOOP_MIN_WORDS = 8
+LOOP_WORD_SHARE = 0.5
 
 class WhisperTranscriber:
-    def __init__(self, model_size="base"):
+    def __init__(self, model_size="base", backend="openai", lazy=False, carry_context=True,
+                 prompt_chars=200, decode_options=None):
         """
         Initialize Whisper model.
         model_size: tiny, base, small, medium, large
+        backend: "openai" (PyTorch FP32), "torch-int8" (dynamically quantized
+            PyTorch) or "faster-whisper" (CTranslate2 int8)
+        lazy: Defer imports and model loading to load() (or the first transcription)
+        carry_context: Pass the tail of the accepted transcript as initial_prompt
+            so each chunk continues the previous one's vocabulary and style
+        prompt_chars: Characters of rolling context carried over
+        decode_options: Overrides for DEFAULT_DECODE_OPTIONS
         """
-        print(f"Loading Whisper {model_size} model...")
-        self.model = whisper.load_model(model_size)
-        print("Whisper model loaded!")
+        self.model_size = model_size
+        self.backend_name = backend
+        self.backend = None
+        self.model = None
+        self.ready = threading.Event()
+        self.timings = {}
+        self.carry_context = carry_context
+        self.prompt_chars = prompt_chars
+        self.decode_options = {**DEFAULT_DECODE_OPTIONS, **(decode_options or {})}
+        self._load_lock = threading.Lock()
+        self.reset_context()
+        self.reset_stats()
+        if not lazy:
+            self.load()
+
+    def reset_context(self):
+        """Forgets the rolling prompt context (start of a new recording)."""
+        self.context = ""
+
+    def reset_stats(self):
+        """Clears the per-session counters."""
+        self.stats = {"chunks": 0, "discarded": 0, "discarded_segments": 0, "fallback_decodes": 0,
+                      "batch_redecodes": 0}
+
+    def get_stats(self):
+        """Chunk counters plus the share of chunks discarded as hallucinations."""
+        stats = dict(self.stats)
+        stats["discard_ratio"] = stats["discarded"] / stats["chunks"] if stats["chunks"] else 0.0
+        return stats
+
+    def load(self):
+        """Imports the engine and loads the model (once). Records timings in self.timings."""
+        with self._load_lock:
+            if self.backend is not None:
+                return
+            print(f"Loading Whisper {self.model_size} model ({self.backend_name} backend)...")
+            backend_cls = get_backend_class(self.backend_name)
+
+            started = time.perf_counter()
+            backend_cls.import_engine()
+            self.timings["import"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            self.backend = backend_cls(self.model_size)
+            self.model = self.backend.model
+            self.timings["model_load"] = time.perf_counter() - started
+            print(f"Whisper model loaded! (import {self.timings['import']:.1f}s, load {self.timings['model_load']:.1f}s)")
+        self.ready.set()
 
-    def transcribe(self, audio_path):
+    def warm_up(self):
+        """Loads the model if needed and runs a first inference on one second of silence."""
+        self.load()
+        started = time.perf_counter()
+        self.backend.transcribe(np.zeros(16000, dtype=np.float32), **self.decode_options)
+        self.timings["first_inference"] = time.perf_counter() - started
+        print(f"Whisper warm-up inference: {self.timings['first_inference']:.1f}s")
+
+    def _load_audio(self, audio, sample_rate=None):
         """
-        Transcribe audio file to text.
-        Returns the transcription text.
+        Turns an AudioChunk, numpy array or file path into 16 kHz mono float32.
+
+        Returns:
+            tuple: (audio_data, audio_path or None), or (None, None) if a file is missing
         """
-        try:
+        audio_path = None
+        if isinstance(audio, (str, os.PathLike)):
+            audio_path = audio
             # Verify file exists
             if not os.path.exists(audio_path):
                 print(f"Error: Audio file not found: {audio_path}")
-                return None
-                
+                return None, None
+
             print(f"Transcribing {audio_path}...")
-            
-            # Load audio with soundfile (avoids ffmpeg dependency)
-            audio_data, sample_rate = sf.read(audio_path)
-            
-            # Convert stereo to mono if needed
-            if len(audio_data.shape) > 1:
-                audio_data = audio_data.mean(axis=1)
-            
-            # Resample to 16kHz if needed (Whisper requires 16000)
+
+            # Load audio with soundfile (avoids ffmpeg dependency), float32 end to end
+            audio_data, sample_rate = sf.read(audio_path, dtype="float32")
+        elif hasattr(audio, "sample_rate"):
+            # AudioChunk handed over in memory
+            audio_data, sample_rate = audio.data, audio.sample_rate
+        else:
+            audio_data = np.asarray(audio)
+            if sample_rate is None:
+                sample_rate = 16000
+
+        # Downmix, float32 conversion and anti-aliased resampling to 16kHz in one pass
+        # (skipped entirely when the capture is already 16 kHz mono float32)
+        if is_whisper_format(audio_data, sample_rate):
+            audio_data = audio_data.reshape(-1)
+        else:
             if sample_rate != 16000:
                 print(f"Resampling from {sample_rate} to 16000 Hz")
-                # Simple integer downsampling if possible (e.g. 48000 -> 16000)
-                if sample_rate % 16000 == 0:
-                    step = int(sample_rate / 16000)
-                    audio_data = audio_data[::step]
-                else:
-                    # Basic linear interpolation for other rates
-                    old_indices = np.arange(len(audio_data))
-                    new_indices = np.linspace(0, len(audio_data) - 1, int(len(audio_data) * 16000 / sample_rate))
-                    audio_data = np.interp(new_indices, old_indices, audio_data)
-            
-            # Whisper expects float32 normalized to [-1, 1]
-            audio_data = audio_data.astype(np.float32)
-            
-            # Transcribe from numpy array
-            result = self.model.transcribe(audio_data, fp16=False)
-            text = result["text"].strip()
-            print(f"Transcription: {text[:100]}...")
-            
-            # Clean up temp file after successful transcription
-            try:
+            audio_data = to_whisper_input(audio_data, sample_rate)
+        return audio_data, audio_path
+
+    def _remove_file(self, audio_path):
+        """Clean up temp file (after transcription, successful or not)."""
+        if not audio_path:
+            return
+        try:
+            if os.path.exists(audio_path):
                 os.remove(audio_path)
-            except:
-                pass
-                
+        except:
+            pass
+
+    def _prompt(self):
+        return self.context if self.carry_context and self.context else None
+
+    def _is_silent(self, segment):
+        """Whisper's own no-speech rule: likely silence and not confidently decoded."""
+        return (segment.get("no_speech_prob", 0.0) > self.decode_options["no_speech_threshold"]
+                and segment.get("avg_logprob", 0.0) < self.decode_options["logprob_threshold"])
+
+    def _needs_fallback(self, segment):
+        """True for a greedy decode that the temperature fallback would have retried."""
+        return not self._is_silent(segment) and (
+            segment.get("compression_ratio", 0.0) > self.decode_options["compression_ratio_threshold"]
+            or segment.get("avg_logprob", 0.0) < self.decode_options["logprob_threshold"])
+
+    def _is_garbage(self, segment):
+        """Silence and repetition loops that survived the temperature fallback."""
+        return (self._is_silent(segment) or
+                segment.get("compression_ratio", 0.0) > self.decode_options["compression_ratio_threshold"])
+
+    def is_hallucination(self, text):
+        """
+        Text-level filter for what Whisper makes up on silence and noise.
+
+        Short answers are kept; silence and low-confidence segments are
+        already dropped by _is_garbage. Repetition is counted in whole words
+        (case and punctuation ignored), so only loops trip it.
+        """
+        if not text.strip():
+            return True
+        if any(marker in text for marker in HALLUCINATION_MARKERS):
+            return True
+        words = re.findall(r"\w+(?:'\w+)*", text.lower())
+        if len(words) < LOOP_MIN_WORDS:
+            return False
+        top = max(words.count(w) for w in set(words))
+        return top / len(words) >= LOOP_WORD_SHARE
+
+    def _accept(self, result):
+        """
+        Filters a decode result and extends the rolling context.
+
+        Returns:
+            str: The accepted text, "" if the chunk was discarded
+        """
+        self.stats["chunks"] += 1
+        segments = result.get("segments")
+        if segments is None:
+            text = result["text"].strip()
+        else:
+            kept = []
+            for seg in segments:
+                if seg.get("temperature", 0.0) > 0:
+                    self.stats["fallback_decodes"] += 1
+                if self._is_garbage(seg):
+                    self.stats["discarded_segments"] += 1
+                    continue
+                kept.append(seg["text"])
+            text = "".join(kept).strip()
+
+        if self.is_hallucination(text):
+            print(f"Skipping hallucination: {text[:50]}...")
+            self.stats["discarded"] += 1
+            return ""
+
+        print(f"Transcription: {text[:100]}...")
+        if self.carry_context:
+            self.context = (self.context + " " + text).strip()[-self.prompt_chars:]
+        return text
+
+    def transcribe(self, audio, sample_rate=None):
+        """
+        Transcribe audio to text.
+
+        audio may be an AudioChunk, a numpy array (pass sample_rate) or the
+        path of an audio file. Files are deleted once transcribed.
+        Returns the transcription text ("" if it was discarded as a
+        hallucination, None on errors).
+        """
+        audio_path = None
+        try:
+            audio_data, audio_path = self._load_audio(audio, sample_rate)
+            if audio_data is None:
+                return None
+            self.load()
+
+            # Transcribe from numpy array, continuing from the previous chunk's text
+            result = self.backend.transcribe(audio_data, initial_prompt=self._prompt(), **self.decode_options)
+            text = self._accept(result)
+
+            self._remove_file(audio_path)
             return text
         except Exception as e:
             print(f"Transcription Error: {e}")
             import traceback
             traceback.print_exc()
             # Try to clean up on error too
-            try:
-                if os.path.exists(audio_path):
-                    os.remove(audio_path)
-            except:
-                pass
+            self._remove_file(audio_path)
             return None
+
+    def transcribe_words(self, audio, sample_rate=None, **options):
+        """
+        Transcribe audio with word-level timestamps (seconds from the start of audio).
+
+        Applies the filters of transcribe() segment by segment: silent,
+        repetitive and hallucinated segments are dropped, the rest keep their
+        words. Stats and the rolling context are left alone, since streaming
+        decodes the same audio many times.
+
+        Returns:
+            list: [{"word", "start", "end"}], empty on failure
+        """
+        try:
+            audio_data, _ = self._load_audio(audio, sample_rate)
+            if audio_data is None or not len(audio_data):
+                return []
+            self.load()
+            result = self.backend.transcribe(audio_data, word_timestamps=True,
+                                             **{**self.decode_options, **options})
+            segments = [seg for seg in result.get("segments", [])
+                        if not self._is_garbage(seg) and seg["text"].strip()
+                        and not self.is_hallucination(seg["text"].strip())]
+            return [{"word": w["word"], "start": w["start"], "end": w["end"]}
+                    for seg in segments for w in seg.get("words") or []]
+        except Exception as e:
+            print(f"Transcription Error: {e}")
+            return []
+
+    def transcribe_batch(self, chunks):
+        """
+        Transcribe several chunks with one batched decoder pass.
+
+        Every chunk of up to 30 s is padded to a 30 s log-mel window and the
+        windows go through the encoder and decoder together (backends without
+        batched decoding take them in turn). Longer chunks fall back to
+        transcribe(), and so do chunks whose greedy batched decode fails the
+        compression-ratio or log-probability checks (temperature fallback).
+        Returns a list of texts ("" for discarded chunks, None for failures)
+        in the order of chunks.
+        """
+        if len(chunks) == 1:
+            return [self.transcribe(chunks[0])]
+
+        texts = [None] * len(chunks)
+        batch_index, batch_audio = [], []
+        for i, chunk in enumerate(chunks):
+            audio_path = None
+            try:
+                audio_data, audio_path = self._load_audio(chunk)
+                if audio_data is None:
+                    continue
+                if len(audio_data) > WINDOW_SAMPLES:
+                    # Decode what came before first, so texts are accepted (and
+                    # extend the rolling prompt) in chunk order
+                    self._decode_batch(batch_index, batch_audio, texts)
+                    batch_index, batch_audio = [], []
+                    texts[i] = self.transcribe(audio_data)
+                    continue
+                batch_audio.append(audio_data)
+                batch_index.append(i)
+            except Exception as e:
+                print(f"Transcription Error: {e}")
+            finally:
+                self._remove_file(audio_path)
+
+        self._decode_batch(batch_index, batch_audio, texts)
+        return texts
+
+    def _decode_batch(self, batch_index, batch_audio, texts):
+        """Decodes consecutive chunks of up to 30 s in one pass; fills texts[i] for every i in batch_index."""
+        if not batch_audio:
+            return
+        try:
+            self.load()
+            print(f"Transcribing batch of {len(batch_audio)} chunks...")
+            results = self.backend.transcribe_batch(batch_audio, prompt=self._prompt(), **self.decode_options)
+            for i, audio_data, result in zip(batch_index, batch_audio, results):
+                if any(self._needs_fallback(seg) for seg in result["segments"]):
+                    self.stats["batch_redecodes"] += 1
+                    result = self.backend.transcribe(audio_data, initial_prompt=self._prompt(),
+                                                     **self.decode_options)
+                texts[i] = self._accept(result)
+        except Exception as e:
+            print(f"Batch Transcription Error: {e}")
+            import traceback
+            traceback.print_exc()
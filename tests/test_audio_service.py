@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+try:
+    from services.audio_service import AudioRecorder, RingBuffer
+except (ImportError, OSError) as e:  # sounddevice, or the PortAudio library it loads
+    pytest.skip(f"audio capture unavailable: {e}", allow_module_level=True)
+
+
+def ramp(start, frames, channels=1):
+    return np.arange(start, start + frames, dtype=np.float32).reshape(-1, 1).repeat(channels, axis=1)
+
+
+def test_ring_emits_full_slots_as_contiguous_views():
+    ring = RingBuffer(slot_frames=100, channels=2, block_frames=25)
+    results = [ring.write(ramp(i * 25, 25, 2), level=i) for i in range(4)]
+
+    assert results[:3] == [None, None, None]
+    view, levels = results[3]
+    np.testing.assert_array_equal(view, ramp(0, 100, 2))
+    np.testing.assert_array_equal(levels, [0, 1, 2, 3])
+
+
+def test_block_straddling_a_slot_boundary_starts_the_next_chunk():
+    ring = RingBuffer(slot_frames=100, channels=1, block_frames=30)
+    chunks = []
+    for i in range(7):
+        finished = ring.write(ramp(i * 30, 30))
+        if finished is not None:
+            chunks.append(finished[0].copy())
+            ring.release()
+    chunks.append(ring.take()[0].copy())
+
+    assert [len(c) for c in chunks] == [100, 100, 10]
+    np.testing.assert_array_equal(np.concatenate(chunks), ramp(0, 210))
+
+
+def test_overrun_drops_blocks_instead_of_overwriting():
+    ring = RingBuffer(slot_frames=10, channels=1, slots=2, block_frames=10)
+    first = ring.write(ramp(0, 10))
+    ring.write(ramp(10, 10))
+
+    assert ring.write(ramp(20, 10)) is None
+    assert ring.overruns == 1
+    np.testing.assert_array_equal(first[0], ramp(0, 10))
+
+    ring.release()
+    assert ring.write(ramp(30, 10)) is not None
+
+
+def record(recorder, blocks):
+    """Feeds blocks through the audio callback; returns (audio, start_time) per finished chunk."""
+    chunks = []
+    for block in blocks:
+        recorder._audio_callback(block, len(block), None, None)
+        while not recorder._boundary_queue.empty():
+            ring, (view, _), rate, start_time = recorder._boundary_queue.get()
+            chunks.append((view.copy(), start_time))
+            ring.release()
+    return chunks
+
+
+def make_recorder(**kwargs):
+    recorder = AudioRecorder(chunk_duration=1.0, **kwargs)
+    block = recorder._prepare_buffer(16000, 1)
+    recorder.running = recorder.capturing = True
+    return recorder, block
+
+
+def test_callback_cuts_chunks_at_chunk_duration():
+    recorder, block = make_recorder()
+    blocks = [ramp(i * block, block) for i in range(120)]
+    chunks = record(recorder, blocks)
+
+    assert [len(audio) for audio, _ in chunks] == [16000, 16000]
+    np.testing.assert_array_equal(np.concatenate([a for a, _ in chunks]), ramp(0, 32000))
+
+
+def test_chunk_start_times_follow_the_frame_count():
+    recorder, _ = make_recorder()
+    # Blocks that do not divide the chunk length straddle the slot boundaries
+    blocks = [ramp(i * 300, 300) for i in range(150)]
+    chunks = record(recorder, blocks)
+
+    starts = [start for _, start in chunks]
+    assert len(starts) == 2
+    assert starts[1] - starts[0] == pytest.approx(1.0)
+
+
+
+def test_vad_segmentation_closes_chunks_at_pauses():
+    recorder, block = make_recorder(segmentation="vad", min_chunk_duration=0.2, pause_duration=0.1)
+    rng = np.random.default_rng(0)
+    speech = [(rng.standard_normal((block, 1)) * 0.2).astype(np.float32) for _ in range(20)]
+    silence = [np.zeros((block, 1), dtype=np.float32) for _ in range(10)]
+    chunks = record(recorder, speech + silence + speech)
+
+    assert len(chunks) == 1
+    assert 0.4 * 16000 <= len(chunks[0][0]) < 16000
@@ -0,0 +1,60 @@
+import queue
+import time
+
+import pytest
+
+from services.batcher import AdaptiveBatcher
+from services.metrics import MetricsRegistry
+
+
+def filled(*items):
+    q = queue.Queue()
+    for item in items:
+        q.put(item)
+    return q
+
+
+def test_idle_queue_returns_single_items():
+    batcher = AdaptiveBatcher(filled("a", "b"), max_batch=4, depth_threshold=2)
+    assert batcher.next_batch() == ["a"]
+    assert batcher.next_batch() == ["b"]
+
+
+def test_backlog_is_coalesced_up_to_max_batch():
+    batcher = AdaptiveBatcher(filled(*"abcdef"), max_batch=4, depth_threshold=2)
+    assert batcher.next_batch() == list("abcd")
+    assert batcher.next_batch() == ["e"]  # Backlog of one is below the threshold
+    assert batcher.next_batch() == ["f"]
+    assert batcher.get_stats()["batch_sizes"] == {1: 2, 4: 1}
+
+
+def test_latency_budget_forces_a_batch():
+    now = time.monotonic()
+    items = [("old", now - 30), ("new", now)]
+    batcher = AdaptiveBatcher(filled(*items), max_batch=4, depth_threshold=5, latency_budget=20.0,
+                              timestamp_of=lambda item: item[1])
+    assert [item[0] for item in batcher.next_batch()] == ["old", "new"]
+
+
+def test_empty_queue_times_out():
+    with pytest.raises(queue.Empty):
+        AdaptiveBatcher(queue.Queue()).next_batch(timeout=0.01)
+
+
+def test_histograms_are_exported_to_the_registry():
+    now = time.monotonic()
+    registry = MetricsRegistry()
+    batcher = AdaptiveBatcher(filled(("a", now - 3), ("b", now), ("c", now)), max_batch=4, depth_threshold=2,
+                              timestamp_of=lambda item: item[1], name="llm_batching")
+    batcher.metrics = registry
+    batcher.next_batch()
+    batcher.record_latency(1.5)
+
+    sizes = registry.histograms["llm_batching_batch_size"]
+    assert (sizes.count, sizes.sum) == (1, 3)
+    waits = registry.histograms["llm_batching_queue_wait_seconds"]
+    assert waits.count == 3 and waits.quantile(1.0) == 5
+    assert registry.histograms["llm_batching_batch_latency_seconds"].count == 1
+    text = registry.to_prometheus()
+    assert "# TYPE noties_llm_batching_queue_wait_seconds histogram" in text
+    assert 'noties_llm_batching_batch_size_bucket{le="3.0"} 1' in text
@@ -0,0 +1,90 @@
+import json
+import os
+
+from services.journal import CAPTURED, SUMMARIZED, TRANSCRIBED, Journal
+
+
+def open_journal(path):
+    return Journal(str(path), fsync_interval=60)
+
+
+def test_replay_restores_states(tmp_path):
+    path = tmp_path / "s.journal"
+    journal = open_journal(path)
+    journal.record_captured(1.0, 1.0, 2.0)
+    journal.record_captured(2.0, 2.0, 3.0)
+    journal.record_captured(3.0, 3.0, 4.0)
+    journal.record_transcribed(2.0, "second")
+    journal.record_transcribed(3.0, "")
+    journal.close()
+
+    replayed = open_journal(path)
+    try:
+        assert replayed.pending_audio() == [(1.0, 1.0, 2.0)]
+        assert replayed.pending_transcripts() == [(2.0, "second")]
+        assert replayed.is_done(3.0)
+        assert not replayed.closed
+    finally:
+        replayed.close()
+
+
+def test_states_never_move_backwards(tmp_path):
+    path = tmp_path / "s.journal"
+    journal = open_journal(path)
+    journal.record_transcribed(1.0, "text")
+    journal.record_summarized([1.0], "summary", {"running_summary": "summary"})
+    journal.record_captured(1.0, 1.0, 2.0)  # Written late by the capture stage
+    journal.close()
+
+    replayed = open_journal(path)
+    try:
+        assert replayed.chunks[1.0]["state"] == SUMMARIZED
+        assert replayed.summary_state == {"summary": "summary", "router": {"running_summary": "summary"}}
+        assert replayed.closed
+    finally:
+        replayed.close()
+
+
+def test_torn_last_line_is_truncated_before_appending(tmp_path):
+    path = tmp_path / "s.journal"
+    journal = open_journal(path)
+    journal.record_captured(1.0, 1.0, 2.0)
+    journal.close()
+    good_size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b'{"state": "transcribed", "key": 1.0, "te')
+
+    replayed = open_journal(path)
+    assert os.path.getsize(path) == good_size
+    assert replayed.chunks[1.0]["state"] == CAPTURED
+    replayed.record_transcribed(1.0, "text")
+    replayed.close()
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["state"] for r in records] == [CAPTURED, TRANSCRIBED]
+
+
+def test_garbage_line_ends_replay(tmp_path):
+    path = tmp_path / "s.journal"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"state": CAPTURED, "key": 1.0, "start": 1.0, "end": 2.0}) + "\n")
+        f.write("not json\n")
+        f.write(json.dumps({"state": CAPTURED, "key": 2.0, "start": 2.0, "end": 3.0}) + "\n")
+
+    replayed = open_journal(path)
+    try:
+        assert list(replayed.chunks) == [1.0]
+    finally:
+        replayed.close()
+
+
+def test_find_unfinished(tmp_path):
+    done = open_journal(tmp_path / "a.journal")
+    done.close()
+    assert Journal.find_unfinished(str(tmp_path)) is None
+
+    unfinished = open_journal(tmp_path / "b.journal")
+    unfinished.record_captured(1.0, 1.0, 2.0)
+    unfinished.close()  # Pending work: not marked closed
+    assert Journal.find_unfinished(str(tmp_path)) == str(tmp_path / "b.journal")
@@ -0,0 +1,69 @@
+import itertools
+import types
+
+import pytest
+
+import services.llm_cache as llm_cache
+from services.llm_cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time() so LRU order never depends on timer resolution."""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def test_key_covers_model_prompt_and_params():
+    messages = [{"role": "user", "content": "hi"}]
+    key = ResponseCache.make_key("m", messages, temperature=0)
+    assert key == ResponseCache.make_key("m", [dict(messages[0])], temperature=0)
+    assert key != ResponseCache.make_key("other", messages, temperature=0)
+    assert key != ResponseCache.make_key("m", messages, temperature=0.5)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # a is now the most recent
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.get_stats()["memory_entries"] == 2
+
+
+def test_disk_tier_survives_a_restart(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(db_path=path)
+    cache.put("a", "A")
+    cache.close()
+
+    reopened = ResponseCache(db_path=path)
+    try:
+        assert reopened.get("a") == "A"
+        assert reopened.get("a") == "A"
+        stats = reopened.get_stats()
+        assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+    finally:
+        reopened.close()
+
+
+def test_disk_tier_evicts_least_recently_used_over_budget(tmp_path, clock):
+    # Every row is 1 + 100 bytes; the budget holds two of them
+    cache = ResponseCache(max_entries=1, db_path=str(tmp_path / "cache.sqlite"), max_disk_bytes=202)
+    try:
+        cache.put("a", "x" * 100)
+        cache.put("b", "y" * 100)
+        cache.put("c", "w" * 100)  # Memory now holds c only
+        assert cache.get("b") == "y" * 100  # From disk: b becomes the most recent
+        cache.put("d", "z" * 100)
+
+        assert cache.get("a") is None
+        assert cache.get("c") is None
+        assert cache.get("b") == "y" * 100
+        assert cache.get("d") == "z" * 100
+        assert cache.get_stats()["evictions"] == 2
+    finally:
+        cache.close()
@@ -0,0 +1,32 @@
+from services.partial_json import partial_json_string
+
+
+def test_field_not_started():
+    assert partial_json_string("", "updated_summary") is None
+    assert partial_json_string('{"updated_sum', "updated_summary") is None
+    assert partial_json_string('{"updated_summary": ', "updated_summary") is None
+
+
+def test_partial_and_complete_values():
+    assert partial_json_string('{"updated_summary": "The team ag', "updated_summary") == "The team ag"
+    assert partial_json_string('{"updated_summary": "Done."}', "updated_summary") == "Done."
+    assert partial_json_string('{"a": "x", "updated_summary": "y', "updated_summary") == "y"
+
+
+def test_escapes():
+    assert partial_json_string('{"updated_summary": "a\\nb \\"q\\"', "updated_summary") == 'a\nb "q"'
+    assert partial_json_string('{"updated_summary": "caf\\u00e9', "updated_summary") == "café"
+
+
+def test_incomplete_escape_is_held_back():
+    assert partial_json_string('{"updated_summary": "line\\', "updated_summary") == "line"
+    assert partial_json_string('{"updated_summary": "caf\\u00', "updated_summary") == "caf"
+
+
+def test_streamed_prefixes_only_grow():
+    reply = '{"updated_summary": "Budget \\"approved\\", caf\\u00e9 at 9\\nNext: hiring"}'
+    values = [partial_json_string(reply[:n], "updated_summary") for n in range(len(reply) + 1)]
+    seen = [v for v in values if v is not None]
+
+    assert seen[-1] == 'Budget "approved", café at 9\nNext: hiring'
+    assert all(b.startswith(a) for a, b in zip(seen, seen[1:]))
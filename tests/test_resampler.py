@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from services.resampler import _polyphase_filter, is_whisper_format, to_whisper_input
+
+
+def reference_resample(x, src_rate, dst_rate):
+    """Textbook upsample -> FIR -> downsample with the same filter, in float64."""
+    up, down, H, delay = _polyphase_filter(src_rate, dst_rate)
+    h = H.T.reshape(-1).astype(np.float64)
+    u = np.zeros(len(x) * up)
+    u[::up] = x
+    n = len(u) + len(h) - 1
+    size = 1 << (n - 1).bit_length()
+    full = np.fft.irfft(np.fft.rfft(u, size) * np.fft.rfft(h, size), size)[:n]
+    n_out = -(-len(x) * up // down)
+    return full[np.arange(n_out) * down + delay]
+
+
+def noise(frames, channels=1, seed=0):
+    shape = (frames, channels) if channels > 1 else (frames,)
+    return (np.random.default_rng(seed).standard_normal(shape) * 0.1).astype(np.float32)
+
+
+@pytest.mark.parametrize("rate", [48000, 44100, 22050, 8000])
+def test_matches_reference_resampler(rate):
+    audio = noise(rate // 10)
+    expected = reference_resample(audio.astype(np.float64), rate, 16000)
+    out = to_whisper_input(audio, rate)
+
+    assert out.dtype == np.float32
+    assert len(out) == len(expected)
+    np.testing.assert_allclose(out, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize("rate", [48000, 44100])
+def test_preserves_speech_band_tone(rate):
+    t = np.arange(rate) / rate
+    out = to_whisper_input(np.sin(2 * np.pi * 1000 * t).astype(np.float32), rate)
+    expected = np.sin(2 * np.pi * 1000 * np.arange(len(out)) / 16000)
+
+    np.testing.assert_allclose(out[200:-200], expected[200:-200], atol=1e-3)
+
+
+@pytest.mark.parametrize("rate", [48000, 44100])
+def test_removes_tones_above_output_nyquist(rate):
+    t = np.arange(rate) / rate
+    out = to_whisper_input(np.sin(2 * np.pi * 10000 * t).astype(np.float32), rate)
+
+    assert np.sqrt(np.mean(out[200:-200] ** 2)) < 1e-4
+
+
+def test_downmixes_channels():
+    stereo = noise(4800, channels=2)
+    out = to_whisper_input(stereo, 48000)
+
+    np.testing.assert_allclose(out, to_whisper_input(stereo.mean(axis=1), 48000), atol=1e-6)
+
+
+def test_whisper_format_passes_through():
+    audio = noise(1600)
+    assert is_whisper_format(audio, 16000)
+    np.testing.assert_array_equal(to_whisper_input(audio, 16000), audio)
+    np.testing.assert_allclose(to_whisper_input(noise(1600, channels=2), 16000), noise(1600, channels=2).mean(axis=1))
+
+
+@pytest.mark.parametrize("frames", [0, 1, 5])
+def test_short_inputs(frames):
+    assert len(to_whisper_input(np.ones(frames, dtype=np.float32), 44100)) == -(-frames * 160 // 441)
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+
+from services.session_store import (AUDIO, FILE_HEADER, RECORD_HEADER, TRANSCRIPT, SessionArchive,
+                                    SessionReader, _load_index)
+
+RATE = 16000
+
+
+def tone(seconds, freq=440.0):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def write_unclosed(path, chunks=3):
+    """An archive whose writer died before close(): no index, no trailer."""
+    archive = SessionArchive(path, started=1000.0)
+    for i in range(chunks):
+        archive.append_audio(tone(1.0), RATE, start_time=1000.0 + i)
+        archive.append_transcript(f"segment {i}", 1000.0 + i, 1001.0 + i)
+    archive._file.close()
+    return archive
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return _load_index(f)
+
+
+def test_unclosed_archive_is_indexed_by_scanning(tmp_path):
+    path = str(tmp_path / "crash.noties")
+    archive = write_unclosed(path)
+
+    started, entries, end = load(path)
+    assert started == 1000.0
+    assert entries == archive.index
+    assert end == os.path.getsize(path)
+
+
+def test_closed_archive_index_matches_scan(tmp_path):
+    path = str(tmp_path / "closed.noties")
+    archive = SessionArchive(path, started=1000.0)
+    archive.append_audio(tone(1.0), RATE, start_time=1000.0)
+    archive.append_transcript("hello", 1000.0, 1001.0)
+    records_end = archive._file.tell()
+    archive.close()
+
+    _, entries, end = load(path)
+    assert [e.kind for e in entries] == [AUDIO, TRANSCRIPT]
+    assert end == records_end  # The index record starts where the records end
+
+
+def test_torn_record_is_dropped_and_truncated_on_reopen(tmp_path):
+    path = str(tmp_path / "torn.noties")
+    write_unclosed(path, chunks=2)
+    good_size = os.path.getsize(path)
+    # Header promising more payload than made it to disk
+    with open(path, "ab") as f:
+        f.write(RECORD_HEADER.pack(AUDIO, 5000, 0, 1010.0, 1011.0) + b"\0" * 100)
+
+    _, entries, end = load(path)
+    assert len(entries) == 4
+    assert end == good_size
+
+    archive = SessionArchive(path)
+    assert os.path.getsize(path) == good_size
+    archive.append_transcript("after restart", 1010.0, 1011.0)
+    archive.close()
+
+    reader = SessionReader(path)
+    try:
+        assert [text for _, _, text in reader.transcript()] == ["segment 0", "segment 1", "after restart"]
+    finally:
+        reader.close()
+
+
+def test_corrupt_payload_ends_the_scan(tmp_path):
+    path = str(tmp_path / "corrupt.noties")
+    archive = write_unclosed(path, chunks=2)
+    last = archive.index[-1]
+    with open(path, "r+b") as f:
+        f.seek(last.offset + RECORD_HEADER.size)
+        byte = f.read(1)
+        f.seek(last.offset + RECORD_HEADER.size)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    _, entries, end = load(path)
+    assert entries == archive.index[:-1]
+    assert end == last.offset
+
+
+def test_header_only_archive_has_no_records(tmp_path):
+    path = str(tmp_path / "empty.noties")
+    SessionArchive(path, started=5.0)._file.close()
+
+    started, entries, end = load(path)
+    assert (started, entries, end) == (5.0, [], FILE_HEADER.size)
+
+
+def test_reader_locates_audio_in_unclosed_archive(tmp_path):
+    path = str(tmp_path / "read.noties")
+    write_unclosed(path)
+
+    reader = SessionReader(path)
+    try:
+        assert reader.duration == 3.0
+        assert len(reader.locate(1.5)) == 1
+        audio, rate = reader.read_audio(0.5, 2.5)
+        assert rate == RATE
+        assert abs(len(audio) - 2 * RATE) <= 1
+    finally:
+        reader.close()
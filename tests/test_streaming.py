@@ -0,0 +1,89 @@
+import numpy as np
+
+from services.streaming import StreamingTranscriber
+
+RATE = 16000
+
+
+class ScriptedTranscriber:
+    """
+    Stands in for WhisperTranscriber: "hears" the words of a script that lie
+    inside the buffer it is given, with timestamps relative to the buffer.
+    """
+    def __init__(self, script, jitter=0.03):
+        self.script = script   # [(word, start, end)] on the stream timeline
+        self.jitter = jitter   # Re-decodes place boundaries slightly differently
+        self.streamer = None
+        self.fail_next = False
+        self.decodes = 0
+
+    def _load_audio(self, chunk, sample_rate=None):
+        return chunk, None
+
+    def transcribe_words(self, audio, sample_rate=None, **options):
+        self.decodes += 1
+        if self.fail_next:
+            self.fail_next = False
+            return []
+        begin = self.streamer.buffer_start
+        end = begin + len(audio) / RATE
+        shift = self.jitter if self.decodes % 2 else -self.jitter
+        return [{"word": w, "start": s - begin + shift, "end": e - begin + shift}
+                for w, s, e in self.script if s >= begin - 0.05 and e <= end]
+
+
+def script(n, word_seconds=0.4):
+    return [(f" w{i}", i * word_seconds + 0.05, (i + 1) * word_seconds) for i in range(n)]
+
+
+def run(transcriber, seconds, chunk_seconds=1.0, **kwargs):
+    streamer = StreamingTranscriber(transcriber, **kwargs)
+    transcriber.streamer = streamer
+    committed = []
+    for _ in range(int(seconds / chunk_seconds)):
+        text, _ = streamer.process(np.zeros(int(chunk_seconds * RATE), dtype=np.float32))
+        committed.append(text)
+    committed.append(streamer.flush())
+    return streamer, " ".join(t for t in committed if t)
+
+
+def test_overlapping_windows_commit_every_word_once():
+    words = script(50)
+    streamer, text = run(ScriptedTranscriber(words), 20)
+
+    assert text.split() == [w.strip() for w, _, _ in words]
+    assert streamer.stats["committed_words"] == 50
+
+
+def test_partial_hypothesis_is_the_uncommitted_tail():
+    transcriber = ScriptedTranscriber(script(10))
+    streamer = StreamingTranscriber(transcriber, stability_margin=1.0)
+    transcriber.streamer = streamer
+    committed, partial = streamer.process(np.zeros(2 * RATE, dtype=np.float32))
+
+    assert committed.split() == ["w0", "w1"]
+    assert partial.split() == ["w2", "w3", "w4"]
+
+
+def test_empty_decode_keeps_the_hypothesis():
+    transcriber = ScriptedTranscriber(script(30))
+    streamer = StreamingTranscriber(transcriber, window_duration=3.0, stability_margin=2.0)
+    transcriber.streamer = streamer
+    pieces = [streamer.process(np.zeros(RATE, dtype=np.float32))[0] for _ in range(3)]
+    # Every decode from here on finds nothing; the pending words must still be committed
+    transcriber.script = []
+    pieces += [streamer.process(np.zeros(RATE, dtype=np.float32))[0] for _ in range(4)]
+
+    assert " ".join(p for p in pieces if p).split() == [f"w{i}" for i in range(7)]
+
+
+def test_silence_commits_the_pending_words():
+    transcriber = ScriptedTranscriber(script(4))
+    streamer = StreamingTranscriber(transcriber, stability_margin=5.0)
+    transcriber.streamer = streamer
+    _, partial = streamer.process(np.zeros(2 * RATE, dtype=np.float32))
+    assert partial.split() == ["w0", "w1", "w2", "w3"]
+
+    committed, partial = streamer.process(np.zeros(RATE, dtype=np.float32), has_speech=False)
+    assert (committed.split(), partial) == (["w0", "w1", "w2", "w3"], "")
+    assert streamer.process(np.zeros(RATE, dtype=np.float32), has_speech=False) == ("", "")
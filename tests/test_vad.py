@@ -0,0 +1,122 @@
+import numpy as np
+
+from services.vad import EnergyVAD, PauseDetector
+
+RATE = 16000
+
+
+class Chunk:
+    """The AudioChunk attributes the VAD reads (AudioChunk itself imports sounddevice)."""
+    def __init__(self, data, sample_rate=RATE, channels=1, start_time=None, path=None,
+                 block_rms=None, block_duration=None, queued_at=None):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.start_time = start_time
+        self.path = path
+        self.block_rms = block_rms
+        self.block_duration = block_duration
+        self.queued_at = queued_at
+
+    @property
+    def duration(self):
+        return len(self.data) / float(self.sample_rate)
+
+
+def signal(*parts, seed=0):
+    """Concatenates (seconds, amplitude) parts of white noise."""
+    rng = np.random.default_rng(seed)
+    return np.concatenate([(rng.standard_normal(int(s * RATE)) * a).astype(np.float32) for s, a in parts])
+
+
+def test_silent_chunk_is_skipped():
+    vad = EnergyVAD()
+    assert vad.process(Chunk(signal((5, 0.001)))) is None
+    assert vad.get_stats()["skipped"] == 1
+
+
+def test_speech_is_trimmed_with_padding():
+    vad = EnergyVAD(padding=0.2, hangover=0.3)
+    chunk = Chunk(signal((2, 0.001), (1, 0.2), (2, 0.001)), start_time=100.0)
+    trimmed = vad.process(chunk)
+
+    assert trimmed is not None
+    start = trimmed.start_time - 100.0
+    assert 1.7 <= start <= 2.0
+    assert 1.0 <= trimmed.duration <= 1.0 + 0.2 + 0.3 + 0.2 + 0.05
+    assert np.shares_memory(trimmed.data, chunk.data)
+
+
+def test_short_click_is_not_speech():
+    vad = EnergyVAD(min_speech_duration=0.3)
+    assert vad.process(Chunk(signal((2, 0.001), (0.1, 0.3), (2, 0.001)))) is None
+
+
+def test_uses_recorder_block_levels():
+    vad = EnergyVAD()
+    levels = np.array([0.001] * 50 + [0.2] * 50 + [0.001] * 50, dtype=np.float32)
+    # The samples are silent; only the block levels say there is speech
+    chunk = Chunk(np.zeros(3 * RATE, dtype=np.float32), block_rms=levels, block_duration=0.02)
+    trimmed = vad.process(chunk)
+
+    assert trimmed is not None
+    assert len(trimmed.block_rms) * 0.02 >= 1.0
+
+
+def test_threshold_follows_the_noise_floor():
+    vad = EnergyVAD()
+    # Steady background noise well above min_rms is not speech
+    for seed in range(3):
+        assert vad.process(Chunk(signal((5, 0.01), seed=seed))) is None
+    assert vad.process(Chunk(signal((2, 0.01), (1, 0.2), (2, 0.01), seed=4))) is not None
+
+
+def feed(detector, levels):
+    """Block index of the first pause, or None."""
+    for i, rms in enumerate(levels):
+        if detector.update(rms):
+            return i
+    return None
+
+
+def speech_levels(seconds, seed=0):
+    """Block levels of talking: loud syllables with short quiet gaps between words."""
+    rng = np.random.default_rng(seed)
+    levels = rng.uniform(0.05, 0.2, int(seconds / 0.02))
+    levels[7::15] = 0.002
+    return list(levels)
+
+
+def test_pause_after_speech():
+    detector = PauseDetector(0.02, pause_duration=0.5)
+    pause = feed(detector, [0.001] * 50 + speech_levels(3) + [0.001] * 50)
+
+    assert pause == 50 + 150 + 24
+
+
+def test_recording_that_starts_mid_speech():
+    detector = PauseDetector(0.02, pause_duration=0.5)
+    # Steady talking from the first block on must not become the noise floor
+    talking = list(np.random.default_rng(0).uniform(0.08, 0.12, 50))
+    pause = feed(detector, talking + [0.001] * 50)
+
+    assert pause == 50 + 24
+
+
+def test_long_speech_does_not_become_the_floor():
+    detector = PauseDetector(0.02, pause_duration=0.5)
+    feed(detector, [0.001] * 50 + speech_levels(60))
+
+    assert detector.noise_floor < 0.004
+    assert feed(detector, [0.001] * 50) == 24
+
+
+def test_floor_rises_to_a_noisy_room():
+    detector = PauseDetector(0.02, pause_duration=0.5)
+    for rms in np.random.default_rng(0).uniform(0.02, 0.03, 500):  # 10 s of loud background
+        detector.observe(rms)
+
+    assert 0.015 < detector.noise_floor < 0.03
+    detector.reset()
+    noisy_pause = [0.025] * 50
+    assert feed(detector, [v + 0.2 for v in speech_levels(3)] + noisy_pause) == 150 + 24
@@ -0,0 +1,41 @@
+import pytest
+
+from services.whisper_service import WhisperTranscriber
+
+
+@pytest.fixture
+def transcriber():
+    return WhisperTranscriber(lazy=True)
+
+
+@pytest.mark.parametrize("text", [
+    "Yes.",
+    "No",
+    "OK, go.",
+    "I think I should say that I agree with the plan.",
+    "The budget is there, other teams need them, and the team said the timeline is fine.",
+    "Thanks, thanks a lot. That was really helpful, thank you.",
+])
+def test_real_speech_is_kept(transcriber, text):
+    assert not transcriber.is_hallucination(text)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "Thank you. Thank you. Thank you. Thank you.",
+    "the the the the the the the the",
+    "So, so, so, so, so, so, so, and so.",
+    "Growth was 2.5% this quarter.",
+    "1-2-3-4, 1-2-3-4",
+])
+def test_loops_and_markers_are_dropped(transcriber, text):
+    assert transcriber.is_hallucination(text)
+
+
+def test_accept_keeps_short_answers(transcriber):
+    result = {"text": " Yes.", "segments": [
+        {"text": " Yes.", "no_speech_prob": 0.1, "avg_logprob": -0.3, "compression_ratio": 0.8}]}
+
+    assert transcriber._accept(result) == "Yes."
+    assert transcriber.stats["discarded"] == 0
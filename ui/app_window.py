@@ -2,31 +2,118 @@ import customtkinter as ctk
 import threading
 import time
 import queue
-from services.audio_service import AudioRecorder
+import asyncio
+import os
+from services.audio_service import AudioRecorder, AudioChunk
+from services.vad import EnergyVAD
+from services.batcher import AdaptiveBatcher
 from services.whisper_service import WhisperTranscriber
+from services.transcription_pool import TranscriptionPool
+from services.streaming import StreamingTranscriber
 from services.llm_router import LLMRouter
+from services.llm_cache import ResponseCache
+from services.session_store import SessionArchive, SessionReader
+from services.journal import Journal
+from services.search_index import SearchIndex
+from services.metrics import MetricsRegistry, RTF_BUCKETS
+
+# Local app data (caches, archives, indexes)
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".noties")
+SESSIONS_DIR = os.path.join(DATA_DIR, "sessions")
 
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("blue")
 
 class NotiesApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, transcription_workers=0, streaming=False, show_metrics=False, metrics_port=None,
+                 metrics_log=None):
+        """
+        Args:
+            transcription_workers: Whisper worker processes (0 = transcribe in this process)
+            streaming: Re-decode a sliding window every 1.5 s and show partial text as it is
+                spoken (decodes in this process, so it cannot be combined with workers)
+            show_metrics: Show a live pipeline metrics panel in the sidebar
+            metrics_port: Serve Prometheus metrics on http://127.0.0.1:<port>/metrics
+            metrics_log: Append a JSON metrics snapshot to this file every 10 s
+        """
+        if streaming and transcription_workers > 0:
+            raise ValueError("Streaming mode decodes in-process; set transcription_workers=0")
         super().__init__()
+        self._startup_started = time.perf_counter()
 
         self.title("Noties - Realtime AI Meeting Assistant")
         self.geometry("1100x700")
 
         # Services
-        self.audio_recorder = AudioRecorder(chunk_duration=15)
-        self.transcriber = WhisperTranscriber(model_size="base")
+        # Capture at 16 kHz mono where possible so chunks need no conversion before Whisper.
+        # Chunks close at the first pause after 4 s (15 s at most) so utterances stay whole.
+        # Streaming mode instead feeds 1.5 s chunks to a sliding-window decoder.
+        if streaming:
+            self.audio_recorder = AudioRecorder(chunk_duration=1.5, capture_profile="transcription")
+        else:
+            self.audio_recorder = AudioRecorder(chunk_duration=15, capture_profile="transcription",
+                                                segmentation="vad", min_chunk_duration=4)
+        # The model (and torch) load on a background thread once the window is up.
+        # With workers, each process loads its own model and decodes outside this GIL.
+        if transcription_workers > 0:
+            self.transcriber = TranscriptionPool(workers=transcription_workers, model_size="base")
+        else:
+            self.transcriber = WhisperTranscriber(model_size="base", lazy=True)
+        self.streamer = StreamingTranscriber(self.transcriber) if streaming else None
+        # Energy gate in front of Whisper (reuses the recorder's per-block RMS)
+        self.vad = EnergyVAD()
         # Using OpenRouter with free Nvidia model
-        self.llm = LLMRouter(model_name="nvidia/nemotron-nano-9b-v2:free")
+        # Hierarchical summaries: per-chunk cost stays fixed however long the meeting runs
+        # Replayed or re-imported audio is answered from the response cache
+        self.llm_cache = ResponseCache(db_path=os.path.join(DATA_DIR, "llm_cache.sqlite"))
+        self.llm = self._create_router()
+        # Full-text search over the transcripts of every archived meeting
+        self.search_index = SearchIndex(os.path.join(DATA_DIR, "search.sqlite"))
+        # Stage latencies are observed as they happen; everything else is read from the
+        # existing stats when metrics are exported
+        self.metrics = MetricsRegistry()
+        self.metrics.add_collector("pipeline", self._pipeline_gauges)
+        self.audio_recorder.metrics = self.metrics
+        self.show_metrics = show_metrics
         
         # State
         self.is_running = False
-        self.process_thread = None
+        self.transcribe_thread = None
+        self.summarize_thread = None
+        self.models_ready = threading.Event()
+        self.session_archive = None # Audio, transcript and summaries of this run (see start_recording)
+        self.meeting_id = None      # The run's meeting in the search index
+        self.journal = None         # Processing state of the session's chunks (crash recovery)
+        # Unfinished session from the last run, drained next to this run's (see _resume_session)
+        self.resumed = None
+        self._resumed_lock = threading.Lock()
+        self._partial_shown = False
+        self.startup_timings = {}
+        
+        # Pipeline: audio_queue -> Whisper stage -> transcript_queue (bounded) -> LLM stage
+        self.transcript_queue = queue.Queue(maxsize=8)
+        # Drain up to 4 pending chunks (one per worker if more) into one Whisper pass when audio backs up
+        self.audio_batcher = AdaptiveBatcher(self.audio_recorder.audio_queue, max_batch=max(4, transcription_workers),
+                                             depth_threshold=1, latency_budget=float("inf"), name="audio_batching")
+        # Coalesce pending transcripts into one LLM call when the queue backs up
+        self.llm_batcher = AdaptiveBatcher(self.transcript_queue, max_batch=4, depth_threshold=2,
+                                           latency_budget=20.0, timestamp_of=lambda item: item[1],
+                                           name="llm_batching")
+        # Batch sizes, waits and latencies for tuning the latency budget
+        self.audio_batcher.metrics = self.llm_batcher.metrics = self.metrics
+        self._last_summary_push = 0.0
+        self.pipeline_stats = {
+            "transcribe": {"processed": 0, "batches": 0, "busy_seconds": 0.0, "blocked_seconds": 0.0},
+            "summarize": {"processed": 0, "calls": 0, "busy_seconds": 0.0},
+        }
 
         self._init_ui()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._resume_session()
+        if metrics_port:
+            self.metrics.serve(metrics_port)
+        if metrics_log:
+            self.metrics.start_json_log(metrics_log)
 
     def _init_ui(self):
         # Configure Grid
@@ -98,6 +185,34 @@ class NotiesApp(ctk.CTk):
         self.status_label = ctk.CTkLabel(self.status_frame, text="Ready", text_color="#aaaaaa", font=("Roboto", 12))
         self.status_label.pack(side="left", pady=5)
 
+        # Search Section
+        ctk.CTkLabel(self.sidebar, text="SEARCH TRANSCRIPTS", 
+                     font=ctk.CTkFont(family="Roboto", size=11, weight="bold"),
+                     text_color="#666666").grid(row=8, column=0, padx=20, pady=(20, 5), sticky="w")
+        
+        search_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        search_frame.grid(row=9, column=0, padx=20, sticky="ew")
+        
+        self.search_entry = ctk.CTkEntry(search_frame, placeholder_text="e.g. budget", width=200,
+                                         fg_color="#333333", border_color="#444444", text_color="white")
+        self.search_entry.pack(fill="x", pady=(0, 5))
+        self.search_entry.bind("<Return>", lambda event: self._run_search())
+        
+        self.search_results = ctk.CTkTextbox(search_frame, width=200, height=160, fg_color="#262626",
+                                             text_color="#E5E7EB", font=("Roboto", 11), wrap="word")
+        self.search_results.pack(fill="x")
+        self.search_results.configure(state="disabled")
+
+        # Metrics Section (optional, below the spacer)
+        if self.show_metrics:
+            ctk.CTkLabel(self.sidebar, text="PIPELINE METRICS", 
+                         font=ctk.CTkFont(family="Roboto", size=11, weight="bold"),
+                         text_color="#666666").grid(row=11, column=0, padx=20, pady=(10, 5), sticky="w")
+            
+            self.metrics_box = ctk.CTkTextbox(self.sidebar, width=200, height=190, fg_color="#262626",
+                                              text_color="#E5E7EB", font=("Roboto Mono", 10), wrap="none")
+            self.metrics_box.grid(row=12, column=0, padx=20, pady=(0, 20), sticky="ew")
+            self.metrics_box.configure(state="disabled")
 
         # --- Main Content (Split View) ---
         self.content = ctk.CTkFrame(self, fg_color="#121212") # Very Dark Background
@@ -112,6 +227,7 @@ class NotiesApp(ctk.CTk):
                                            text_color="#E5E7EB", font=("Roboto", 14),
                                            corner_radius=8)
         self.transcript_box.pack(expand=True, fill="both", padx=15, pady=15)
+        self.transcript_box.tag_config("partial", foreground="#888888")  # Unstable streaming text
 
         # 2. Summary Card
         self.summary_card = self._create_card(self.content, "AI Summary", "🧠", 1)
@@ -131,12 +247,51 @@ class NotiesApp(ctk.CTk):
         # Default to first available device
         self._restart_monitoring()
 
-        # Start Processing Thread
-        self.process_thread = threading.Thread(target=self._process_loop, daemon=True) # Daemon!
-        self.process_thread.start()
+        # Event loop shared by all async LLM requests (one connection pool)
+        self.llm_loop = asyncio.new_event_loop()
+        self.llm_loop_thread = threading.Thread(target=self.llm_loop.run_forever, daemon=True)
+        self.llm_loop_thread.start()
+
+        # Start Processing Threads (one per pipeline stage)
+        transcribe_target = self._stream_loop if self.streamer else self._transcribe_loop
+        self.transcribe_thread = threading.Thread(target=transcribe_target, daemon=True) # Daemon!
+        self.transcribe_thread.start()
+        self.summarize_thread = threading.Thread(target=self._summarize_loop, daemon=True)
+        self.summarize_thread.start()
         
         # Start level monitoring timer
         self._update_level_meter()
+        if self.show_metrics:
+            self._update_metrics_panel()
+
+        # Window is ready; load models behind it (capture already buffers into audio_queue)
+        self.startup_timings["window"] = time.perf_counter() - self._startup_started
+        print(f"Window ready in {self.startup_timings['window']:.2f}s")
+        self.update_status("Loading model...")
+        threading.Thread(target=self._load_models, daemon=True).start()
+
+    def _load_models(self):
+        """Imports litellm, loads Whisper and runs a warm-up inference off the UI thread."""
+        try:
+            self.startup_timings["litellm_import"] = self.llm.warm_up()
+            self.transcriber.warm_up()
+        except Exception as e:
+            print(f"Model Loading Error: {e}")
+            self.update_status(f"Error: {str(e)[:30]}...", "error")
+            return
+        
+        self.startup_timings.update(self.transcriber.timings)
+        self.startup_timings["total"] = time.perf_counter() - self._startup_started
+        print("Startup timings: " + ", ".join(f"{name} {seconds:.2f}s"
+                                                for name, seconds in self.startup_timings.items()))
+        self.models_ready.set()
+        if self.is_running:
+            self.update_status("Recording...", "active")
+        else:
+            self.update_status("Ready")
+        
+        # Pick up archives from earlier runs that were never indexed
+        self._index_archives()
 
     def _create_card(self, parent, title, icon, col):
         """Helper to create consistent card layout"""
@@ -153,11 +308,122 @@ class NotiesApp(ctk.CTk):
         
         return card
 
+    def _create_router(self):
+        return LLMRouter(model_name="nvidia/nemotron-nano-9b-v2:free", context_mode="hierarchical",
+                         cache=self.llm_cache)
+
     def _restart_monitoring(self):
         """Restarts audio stream with current device selection."""
         device = self.device_var.get()
         self.audio_recorder.start_stream(device)
 
+    def _on_close(self):
+        """Writes the session archive's index before the window goes away."""
+        self.audio_recorder.stop_stream()
+        if self.session_archive is not None:
+            self.session_archive.close()
+        # Left open (and resumed on the next start) if chunks are still in flight
+        if self.journal is not None:
+            self.journal.close()
+        if self.resumed is not None:
+            self.resumed["archive"].close()
+            self.resumed["journal"].close()
+        self.destroy()
+
+    def _open_session(self, path, journal=None):
+        """Makes path the session archive that chunks, transcripts and summaries go to."""
+        self.session_archive = SessionArchive(path)
+        self.audio_recorder.archive = self.session_archive
+        self.meeting_id = self.search_index.add_meeting(path, self.session_archive.started)
+        # Streamed utterances span many chunks, so only chunked transcription is journaled
+        if self.streamer is None:
+            self.journal = journal or Journal(os.path.splitext(path)[0] + ".journal")
+            self.audio_recorder.journal = self.journal
+
+    def _resume_session(self):
+        """
+        Continues the last session if the app stopped before processing all of it.
+
+        Captured chunks that were never transcribed are re-read from the
+        archive, transcripts that never reached the LLM are queued again and
+        the summary is continued by a router restored from the journal;
+        nothing that the journal records as done is redone. The resumed
+        session keeps its own archive, journal and router (self.resumed):
+        its chunks are told apart by their journal keys, and it is closed
+        once they are all done, so a new recording always opens a fresh
+        session.
+        """
+        journal_path = Journal.find_unfinished(SESSIONS_DIR)
+        if journal_path is None or self.streamer is not None:
+            return
+        archive_path = os.path.splitext(journal_path)[0] + ".noties"
+        if not os.path.exists(archive_path):
+            return
+        
+        journal = Journal(journal_path)
+        reader = SessionReader(archive_path)
+        try:
+            chunks = []
+            for key, start, end in journal.pending_audio():
+                audio, rate = reader.read_audio(start - reader.started, end - reader.started)
+                if audio is not None:
+                    chunks.append(AudioChunk(audio, rate, start_time=key))
+            transcript = [text for _, _, text in reader.transcript()]
+        finally:
+            reader.close()
+        archive = SessionArchive(archive_path)
+        llm = self._create_router()
+        self.resumed = {"archive": archive, "journal": journal, "llm": llm,
+                        "meeting_id": self.search_index.add_meeting(archive_path, archive.started)}
+        
+        if journal.summary_state:
+            if journal.summary_state["router"]:
+                llm.restore_state(journal.summary_state["router"])
+            self._safe_update_summary(journal.summary_state["summary"])
+        for text in transcript:
+            self._safe_append_transcript(text)
+        
+        for chunk in chunks:
+            self.audio_recorder.audio_queue.put(chunk)
+        pending_texts = journal.pending_transcripts()
+        # The transcript queue is bounded; fill it from a thread once the LLM stage runs
+        threading.Thread(target=lambda: [self.transcript_queue.put((text, time.monotonic(), [key]))
+                                         for key, text in pending_texts], daemon=True).start()
+        print(f"Resumed {os.path.basename(archive_path)}: {len(chunks)} chunks to transcribe, "
+              f"{len(pending_texts)} transcripts to summarize")
+        self._finish_resumed()
+
+    def _is_resumed(self, keys):
+        """True if the chunks keyed by keys belong to the resumed session."""
+        resumed = self.resumed
+        return resumed is not None and any(key in resumed["journal"].chunks for key in keys)
+
+    def _session(self, keys):
+        """(archive, journal, meeting_id, llm) that the chunks keyed by keys belong to."""
+        resumed = self.resumed
+        if resumed is not None and self._is_resumed(keys):
+            return resumed["archive"], resumed["journal"], resumed["meeting_id"], resumed["llm"]
+        return self.session_archive, self.journal, self.meeting_id, self.llm
+
+    def _record_transcribed(self, key, text):
+        """Journals a transcribed chunk in its session's journal."""
+        journal = self._session([key])[1]
+        if journal is not None:
+            journal.record_transcribed(key, text)
+            if journal is not self.journal:
+                self._finish_resumed()
+
+    def _finish_resumed(self):
+        """Closes the resumed session once the journal has nothing of it left to process."""
+        with self._resumed_lock:
+            resumed = self.resumed
+            if resumed is None or resumed["journal"].has_pending():
+                return
+            self.resumed = None
+        resumed["archive"].close()
+        resumed["journal"].close()
+        print(f"Finished resumed session {os.path.basename(resumed['archive'].path)}")
+
     def toggle_recording(self):
         if not self.is_running:
             self.start_recording()
@@ -167,7 +433,17 @@ class NotiesApp(ctk.CTk):
     def start_recording(self):
         self.is_running = True
         self.start_btn.configure(text="STOP RECORDING", fg_color="#EF4444", hover_color="#DC2626") # Red
-        self.update_status("Recording...", "active")
+        if self.models_ready.is_set():
+            self.update_status("Recording...", "active")
+        else:
+            self.update_status("Recording (loading model)...", "active")
+        
+        # New recording: don't prompt Whisper with what was said before the stop
+        self.transcriber.reset_context()
+        
+        # One archive per run; recordings after a stop are appended to it
+        if self.session_archive is None:
+            self._open_session(os.path.join(SESSIONS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".noties"))
         
         # Enable capturing (stream is already running)
         self.audio_recorder.start_recording()
@@ -189,77 +465,341 @@ class NotiesApp(ctk.CTk):
         # Schedule next update in 100ms regardless of recording state
         self.after(100, self._update_level_meter)
 
-    def _process_loop(self):
+    def _transcribe_loop(self):
+        """Stage 1: audio chunks -> VAD -> Whisper (batched when backed up) -> transcript queue."""
+        # Chunks recorded while the model loads wait in the audio queue
+        self.models_ready.wait()
         # Keep thread alive to process queue
         while True:
-            # Get chunk (timeout allows checking if we should exit)
+            # Get chunks (timeout allows checking if we should exit)
             try:
-                item = self.audio_recorder.get_next_chunk()
-            except:
+                items = self.audio_batcher.next_batch(timeout=1)
+            except queue.Empty:
                 continue
             
-            if not item:
+            # A device error stops the recording; the chunks drained with it are still transcribed
+            errors = [item for item in items if isinstance(item, dict) and "error" in item]
+            chunks = [item for item in items if not (isinstance(item, dict) and "error" in item)]
+            if chunks:
+                self._transcribe_chunks(chunks)
+            if errors:
+                self.update_status(f"Error: {errors[0]['error']}", "error")
+                self.after(0, self.stop_recording)
+
+    def _transcribe_chunks(self, items):
+        """VAD, one Whisper pass and the hand-over to the LLM stage for a batch of chunks."""
+        stats = self.pipeline_stats["transcribe"]
+        # 1. Skip silent chunks before Whisper, trim silence around speech
+        # (journal keys are the capture start times, taken before trimming)
+        chunks, keys = [], []
+        for chunk in items:
+            key = getattr(chunk, "start_time", None)
+            if isinstance(chunk, AudioChunk):
+                chunk = self.vad.process(chunk)
+            if chunk is not None:
+                chunks.append(chunk)
+                keys.append(key)
+            elif key:
+                self._record_transcribed(key, "")
+        if not chunks:
+            self.update_status("Skipping silence...", "active")
+            return
+        
+        self.update_status(f"Transcribing...", "active")
+        
+        # 2. Transcribe with Whisper (AudioChunks handed over in memory, one decoder pass per batch)
+        self._observe_dequeued(chunks)
+        try:
+            started = time.perf_counter()
+            texts = self.transcriber.transcribe_batch(chunks)
+            elapsed = time.perf_counter() - started
+            stats["busy_seconds"] += elapsed
+            stats["processed"] += len(chunks)
+            stats["batches"] += 1
+            self._observe_transcription(elapsed, sum(chunk.duration for chunk in chunks))
+        except Exception as e:
+            print(f"Processing Error: {e}")
+            self.update_status(f"Error: {str(e)[:30]}...", "error")
+            return
+        
+        for chunk, key, text in zip(chunks, keys, texts):
+            # Empty when the transcriber discarded the chunk as a hallucination
+            # (None is a failure: left unjournaled, so a restart tries again)
+            if not text:
+                if text == "" and key:
+                    self._record_transcribed(key, "")
+                self.update_status("Skipping silence...", "active")
                 continue
             
-            # Handle errors
-            if isinstance(item, dict) and "error" in item:
-                self.update_status(f"Error: {item['error']}", "error")
-                self.stop_recording()
-                break
-                    
-            audio_path = item
-            if audio_path:
-                self.update_status(f"Transcribing...", "active")
+            if chunk.start_time:
+                self._commit_segment(text, chunk.start_time, chunk.start_time + chunk.duration,
+                                     [key] if key else [])
+            if key:
+                self._record_transcribed(key, text)
+                
+            # Safe Update Transcript
+            self.after(0, lambda t=text: self._safe_append_transcript(t))
+            
+            # 3. Hand over to the LLM stage (blocks when it is too far behind)
+            started = time.perf_counter()
+            self.transcript_queue.put((text, time.monotonic(), [key] if key else []))
+            stats["blocked_seconds"] += time.perf_counter() - started
+
+    def _stream_loop(self):
+        """Stage 1 (streaming mode): short chunks -> sliding-window Whisper -> partial/final text."""
+        stats = self.pipeline_stats["transcribe"]
+        self.models_ready.wait()
+        utterance, utterance_started, utterance_span = [], None, None
+        time_offset = time.time() # Epoch time of stream time 0 (re-anchored at every chunk)
+        while True:
+            final, partial, has_speech = "", "", True
+            try:
+                chunk = self.audio_recorder.audio_queue.get(timeout=1)
+            except queue.Empty:
+                # Recording stopped mid-utterance: commit what is left
+                if self.is_running or not self.streamer.hypothesis:
+                    continue
+                final, has_speech = self.streamer.flush(), False
+            else:
+                if isinstance(chunk, dict) and "error" in chunk:
+                    self.update_status(f"Error: {chunk['error']}", "error")
+                    self.stop_recording()
+                    break
                 
-                # 2. Transcribe with Whisper
+                # The VAD only gates decoding here; the audio itself keeps the stream timeline
+                has_speech = isinstance(chunk, AudioChunk) and self.vad.process(chunk) is not None
+                if isinstance(chunk, AudioChunk) and chunk.start_time:
+                    time_offset = chunk.start_time - self.streamer.stream_end
+                self._observe_dequeued([chunk])
                 try:
-                    # Method is transcribe() and returns string
-                    text = self.transcriber.transcribe(audio_path)
-                    
-                    if not text:
-                        text = ""
-                    else:
-                        text = text.strip()
-                    
-                    print(f"RAW Transcription: [{text}]") # DEBUG
-                    
-                    # Simple hallucination filter
-                    is_hallucination = (
-                        len(text) < 5 or 
-                        "1.5%" in text or 
-                        "2.5%" in text or 
-                        "1-2-3-4" in text or
-                        text.count(text.split()[0]) > 4 
-                    )
-                    
-                    if is_hallucination:
-                        print(f"Skipping hallucination: {text[:50]}...")
-                        self.update_status("Skipping silence...", "active")
-                        continue
-                        
-                    # Safe Update Transcript
-                    self.after(0, lambda t=text: self._safe_append_transcript(t))
-                        
-                    self.update_status(f"Summarizing...", "active")
-                    
-                    # 3. Summarize with LLM
-                    result = self.llm.process_transcript(text)
-                    
-                    # Always show transcript, even if summary fails
-                    if result and "error" not in result:
-                        summary = result.get("updated_summary", "")
-                        if summary:
-                             # Safe Update Summary
-                             self.after(0, lambda s=summary: self._safe_update_summary(s))
-                        
-                        self.update_status("Recording...", "active")
+                    started = time.perf_counter()
+                    final, partial = self.streamer.process(chunk, has_speech)
+                    elapsed = time.perf_counter() - started
+                    stats["busy_seconds"] += elapsed
+                    stats["processed"] += 1
+                    if has_speech:
+                        self._observe_transcription(elapsed, chunk.duration)
                 except Exception as e:
                     print(f"Processing Error: {e}")
                     self.update_status(f"Error: {str(e)[:30]}...", "error")
+                    continue
+            
+            if final:
+                self.after(0, lambda t=final: self._safe_append_transcript(t, end=" "))
+                utterance.append(final)
+                utterance_started = utterance_started or time.monotonic()
+                span_start, span_end = self.streamer.last_commit_span
+                utterance_span = [utterance_span[0] if utterance_span else span_start + time_offset,
+                                  span_end + time_offset]
+            self.after(0, lambda t=partial: self._safe_append_transcript(t, partial=True))
+            
+            # Hand each finished utterance (or 15 s of continuous speech) to the LLM stage
+            if utterance and (not has_speech or time.monotonic() - utterance_started >= 15):
+                if not has_speech:
+                    self.after(0, lambda: self._safe_append_transcript(""))
+                self._commit_segment(" ".join(utterance), *utterance_span)
+                started = time.perf_counter()
+                self.transcript_queue.put((" ".join(utterance), time.monotonic(), []))
+                stats["blocked_seconds"] += time.perf_counter() - started
+                utterance, utterance_started, utterance_span = [], None, None
+
+    def _observe_dequeued(self, chunks):
+        """Records how long chunks waited between the recorder's hand-over and transcription."""
+        now = time.time()
+        histogram = self.metrics.histogram("flush_to_transcribe_seconds", "Chunk hand-over to transcription start")
+        for chunk in chunks:
+            if getattr(chunk, "queued_at", None):
+                histogram.observe(max(0.0, now - chunk.queued_at))
+
+    def _observe_transcription(self, seconds, audio_seconds):
+        """Records a Whisper pass: its duration and real-time factor (seconds per audio second)."""
+        self.metrics.histogram("transcribe_seconds", "Whisper pass duration").observe(seconds)
+        self.metrics.counter("transcribed_audio_seconds", "Audio seconds sent to Whisper").inc(audio_seconds)
+        if audio_seconds > 0:
+            self.metrics.histogram("transcribe_rtf", "Whisper real-time factor",
+                                   buckets=RTF_BUCKETS).observe(seconds / audio_seconds)
+
+    def _commit_segment(self, text, start, end, keys=()):
+        """Archives a transcript segment (epoch times) in its session and makes it searchable."""
+        archive, _, meeting_id, _ = self._session(keys)
+        if archive is None:
+            return
+        archive.append_transcript(text, start, end)
+        self.search_index.add_segment(meeting_id, text, start - archive.started, end - archive.started)
+
+    def _index_archives(self):
+        """Adds archived meetings the search index has not seen yet (e.g. copied in from elsewhere)."""
+        if not os.path.isdir(SESSIONS_DIR):
+            return
+        for name in sorted(os.listdir(SESSIONS_DIR)):
+            path = os.path.join(SESSIONS_DIR, name)
+            if name.endswith(".noties") and (self.session_archive is None or path != self.session_archive.path):
+                try:
+                    self.search_index.index_archive(path)
+                except Exception as e:
+                    print(f"Indexing Error ({name}): {e}")
 
-    def _safe_append_transcript(self, text):
+    def _run_search(self):
+        """Runs the sidebar query and lists hits as meeting, time offset and snippet."""
+        query = self.search_entry.get()
+        started = time.perf_counter()
+        hits = self.search_index.search(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        lines = [f"{len(hits)} hits ({elapsed_ms:.1f} ms)"]
+        for hit in hits:
+            minutes, seconds = divmod(int(hit["start"]), 60)
+            hours, minutes = divmod(minutes, 60)
+            offset = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+            lines.append(f"{hit['title']} @ {offset}\n{hit['snippet']}")
+        
+        self.search_results.configure(state="normal")
+        self.search_results.delete("1.0", "end")
+        self.search_results.insert("end", "\n\n".join(lines))
+        self.search_results.configure(state="disabled")
+
+    def _summarize_loop(self):
+        """Stage 2: transcript queue -> LLM summary (overlaps Whisper on the next chunk)."""
+        self.models_ready.wait()
+        while True:
+            # One chunk per call when idle, several when backed up or over the latency budget
+            batch = self.llm_batcher.next_batch()
+            # The resumed session's backlog goes to its own summary first
+            resumed = [self._is_resumed(item[2]) for item in batch]
+            for items in ([item for item, r in zip(batch, resumed) if r],
+                          [item for item, r in zip(batch, resumed) if not r]):
+                if items:
+                    self._summarize_batch(items)
+
+    def _summarize_batch(self, batch):
+        """Folds a batch of transcripts (all of one session) into that session's summary."""
+        stats = self.pipeline_stats["summarize"]
+        keys = [key for item in batch for key in item[2]]
+        archive, journal, _, llm = self._session(keys)
+        # A resumed backlog shows in the summary box only until a new recording has its own
+        shown = llm is self.llm or self.session_archive is None
+        text = "\n\n".join(item[0] for item in batch)
+        self.update_status(f"Summarizing...", "active")
+        
+        try:
+            tokens_before = (llm.usage.get("prompt_tokens", 0), llm.usage.get("completion_tokens", 0))
+            started = time.perf_counter()
+            # Stream the reply on the shared loop; the summary box follows the tokens
+            future = asyncio.run_coroutine_threadsafe(
+                llm.aprocess_transcript(text, on_token=self._on_summary_token if shown else None), self.llm_loop)
+            result = future.result()
+            elapsed = time.perf_counter() - started
+            self.llm_batcher.record_latency(elapsed)
+            self.metrics.histogram("llm_latency_seconds", "LLM summary call duration").observe(elapsed)
+            self.metrics.counter("llm_prompt_tokens", "Prompt tokens billed").inc(
+                max(0, llm.usage.get("prompt_tokens", 0) - tokens_before[0]))
+            self.metrics.counter("llm_completion_tokens", "Completion tokens billed").inc(
+                max(0, llm.usage.get("completion_tokens", 0) - tokens_before[1]))
+            stats["busy_seconds"] += elapsed
+            stats["processed"] += len(batch)
+            stats["calls"] += 1
+            
+            # Always show transcript, even if summary fails
+            if result and "error" not in result:
+                summary = result.get("updated_summary", "")
+                if summary:
+                     # Safe Update Summary
+                     if shown:
+                         self.after(0, lambda s=summary: self._safe_update_summary(s))
+                     if archive is not None:
+                         archive.append_summary(summary)
+                if journal is not None:
+                    journal.record_summarized(keys, summary, llm.export_state())
+                    if journal is not self.journal:
+                        self._finish_resumed()
+                
+                self.update_status("Recording...", "active")
+        except Exception as e:
+            print(f"Processing Error: {e}")
+            self.update_status(f"Error: {str(e)[:30]}...", "error")
+
+    def _on_summary_token(self, delta, partial_summary):
+        """Streams partial summaries to the UI (at most every 100 ms)."""
+        now = time.monotonic()
+        if partial_summary and now - self._last_summary_push >= 0.1:
+            self._last_summary_push = now
+            self.after(0, lambda s=partial_summary: self._safe_update_summary(s))
+
+    def get_pipeline_stats(self):
+        """Queue depths and per-stage counters (processed, busy and backpressure seconds)."""
+        writer_pending, writer_lag = self.audio_recorder.get_writer_lag()
+        return {
+            "writer": {"pending": writer_pending, "lag_seconds": writer_lag},
+            "audio_queue_depth": self.audio_recorder.audio_queue.qsize(),
+            "transcript_queue_depth": self.transcript_queue.qsize(),
+            "input_overflows": self.audio_recorder.get_overflow_count(),
+            "transcribe": dict(self.pipeline_stats["transcribe"]),
+            "vad": self.vad.get_stats(),
+            "whisper": self.transcriber.get_stats(),
+            "audio_batching": self.audio_batcher.get_stats(),
+            "summarize": dict(self.pipeline_stats["summarize"]),
+            "llm_batching": self.llm_batcher.get_stats(),
+            "llm_cache": self.llm_cache.get_stats(),
+            "llm_usage": dict(self.llm.usage),
+        }
+
+    def _pipeline_gauges(self):
+        """
+        get_pipeline_stats() for the metrics collector, without the batchers'
+        bucket counts (the batchers observe them as histograms themselves).
+        """
+        stats = self.get_pipeline_stats()
+        del stats["audio_batching"], stats["llm_batching"]
+        return stats
+
+    def _update_metrics_panel(self):
+        """Refreshes the sidebar metrics panel once a second."""
+        def quantiles(name, scale=1, unit=""):
+            h = self.metrics.histograms.get(name)
+            if h is None or not h.count:
+                return "-"
+            return f"{h.quantile(0.5) * scale:g}/{h.quantile(0.99) * scale:g}{unit}"
+        
+        def count(name):
+            c = self.metrics.counters.get(name)
+            return c.value if c is not None else 0
+        
+        stats = self.get_pipeline_stats()
+        lines = [
+            "p50/p99 (bucket bounds)",
+            f"capture>flush  {quantiles('capture_to_flush_seconds', 1000, ' ms')}",
+            f"flush>whisper  {quantiles('flush_to_transcribe_seconds', 1000, ' ms')}",
+            f"whisper        {quantiles('transcribe_seconds', unit=' s')}",
+            f"RTF            {quantiles('transcribe_rtf')}",
+            f"LLM            {quantiles('llm_latency_seconds', unit=' s')}",
+            f"LLM tokens     {count('llm_prompt_tokens')} in / {count('llm_completion_tokens')} out",
+            f"LLM batch      {quantiles('llm_batching_batch_size')}",
+            f"LLM wait       {quantiles('llm_batching_queue_wait_seconds', unit=' s')}",
+            f"audio batch    {quantiles('audio_batching_batch_size')}",
+            f"queues         audio {stats['audio_queue_depth']}, text {stats['transcript_queue_depth']}",
+            f"writer lag     {stats['writer']['lag_seconds']:.2f} s",
+        ]
+        self.metrics_box.configure(state="normal")
+        self.metrics_box.delete("1.0", "end")
+        self.metrics_box.insert("end", "\n".join(lines))
+        self.metrics_box.configure(state="disabled")
+        self.after(1000, self._update_metrics_panel)
+
+    def _safe_append_transcript(self, text, partial=False, end="\n\n"):
+        """Appends final text, or with partial=True replaces the unstable partial text at the end."""
         self.transcript_box.configure(state="normal")
-        self.transcript_box.insert("end", text + "\n\n")
+        # The partial text always sits at the end; drop it before adding anything
+        if self._partial_shown:
+            self.transcript_box.delete("partial_start", "end-1c")
+            self._partial_shown = False
+        if partial:
+            if text:
+                self.transcript_box.mark_set("partial_start", "end-1c")
+                self.transcript_box.mark_gravity("partial_start", "left")
+                self.transcript_box.insert("end", text, "partial")
+                self._partial_shown = True
+        else:
+            self.transcript_box.insert("end", text + end)
         self.transcript_box.configure(state="disabled")
         self.transcript_box.see("end")
 